@@ -1,8 +1,15 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
+from flask_compress import Compress
+from flask_orjson import OrjsonProvider
+from fastjsonschema import JsonSchemaException, compile as compile_schema
 from emergency_service import EmergencyService
+from config import Config
+import itertools
 import logging
 import json
+import orjson
+import zlib
 
 # Configure logging
 logging.basicConfig(
@@ -13,28 +20,210 @@ logger = logging.getLogger(__name__)
 
 # Initialize Flask app
 app = Flask(__name__)
-CORS(app)  # Enable CORS for all routes
+# Serialize responses with orjson; alert IDs are used as integer dict keys
+app.json = OrjsonProvider(app)
+app.json.option = orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS
+# Enable CORS for all routes; let browsers cache preflights for a day
+CORS(app, resources={r"/*": {"origins": "*"}}, max_age=86400, send_wildcard=True)
+
+# Compress JSON responses; small bodies such as /health are sent as-is
+app.config['COMPRESS_MIMETYPES'] = ['application/json']
+app.config['COMPRESS_LEVEL'] = 4
+app.config['COMPRESS_MIN_SIZE'] = 512
+app.config['COMPRESS_STREAMS'] = False  # Streamed bodies compress themselves
+Compress(app)
 
 # Initialize Emergency Service
 emergency_service = EmergencyService()
 
+# Help information served by /emergency/help
+EMERGENCY_HELP = {
+    'emergency_system_usage': {
+        'quick_emergency': {
+            'endpoint': '/emergency/quick',
+            'method': 'POST',
+            'description': 'Single-click emergency alert',
+            'required_fields': ['phone'],
+            'optional_fields': ['alert_type'],
+            'example': {
+                'phone': '+1234567890',
+                'alert_type': 'medical'
+            }
+        },
+        'emergency_with_location': {
+            'endpoint': '/emergency/trigger',
+            'method': 'POST',
+            'description': 'Emergency alert with specific location',
+            'required_fields': ['phone'],
+            'optional_fields': ['latitude', 'longitude', 'alert_type', 'message'],
+            'example': {
+                'phone': '+1234567890',
+                'latitude': 40.7128,
+                'longitude': -74.0060,
+                'alert_type': 'medical',
+                'message': 'Car accident, need immediate help'
+            }
+        }
+    },
+    'alert_types': ['medical', 'fire', 'police', 'general'],
+    'emergency_numbers': {
+        'ambulance': '911',
+        'police': '911',
+        'fire': '911'
+    },
+    'system_features': [
+        'Automatic location detection',
+        'Emergency contact notification',
+        'Hospital/emergency service lookup',
+        'SMS and email alerts',
+        'Real-time location tracking'
+    ]
+}
+
+# Constant response bodies, encoded once at import
+_HEALTH_RESPONSE = orjson.dumps({
+    'status': 'healthy',
+    'message': 'Emergency Alert System is running',
+    'version': '1.0.0'
+})
+_HELP_RESPONSE = orjson.dumps({
+    'success': True,
+    'help': EMERGENCY_HELP
+})
+_NOT_FOUND_RESPONSE = orjson.dumps({
+    'success': False,
+    'message': 'Endpoint not found'
+})
+_METHOD_NOT_ALLOWED_RESPONSE = orjson.dumps({
+    'success': False,
+    'message': 'Method not allowed'
+})
+_INTERNAL_ERROR_RESPONSE = orjson.dumps({
+    'success': False,
+    'message': 'Internal server error'
+})
+
+# Request body validators, compiled once at import
+_OPTIONAL_STRING = {'type': ['string', 'null']}
+_register_validator = compile_schema({
+    'type': 'object',
+    'required': ['name', 'phone'],
+    'properties': {
+        'name': {'type': 'string'},
+        'phone': {'type': 'string'},
+        'email': _OPTIONAL_STRING,
+        'emergency_contact_1': _OPTIONAL_STRING,
+        'emergency_contact_2': _OPTIONAL_STRING,
+        'medical_info': _OPTIONAL_STRING
+    }
+})
+_location_validator = compile_schema({
+    'type': 'object',
+    'required': ['phone', 'latitude', 'longitude'],
+    'properties': {
+        'phone': {'type': 'string'},
+        'latitude': {'type': 'number'},
+        'longitude': {'type': 'number'}
+    }
+})
+_bulk_location_validator = compile_schema({
+    'type': 'object',
+    'required': ['locations'],
+    'properties': {
+        'locations': {
+            'type': 'array',
+            'minItems': 1,
+            'maxItems': Config.LOCATION_BATCH_MAX,
+            'items': {
+                'type': 'object',
+                'required': ['phone', 'latitude', 'longitude'],
+                'properties': {
+                    'phone': {'type': 'string'},
+                    'latitude': {'type': 'number'},
+                    'longitude': {'type': 'number'}
+                }
+            }
+        }
+    }
+})
+_trigger_validator = compile_schema({
+    'type': 'object',
+    'required': ['phone'],
+    'properties': {
+        'phone': {'type': 'string'},
+        'alert_type': {'type': 'string'},
+        'message': _OPTIONAL_STRING,
+        'latitude': {'type': ['number', 'null']},
+        'longitude': {'type': ['number', 'null']}
+    }
+})
+_cancel_validator = compile_schema({
+    'type': 'object',
+    'properties': {
+        'reason': {'type': 'string'}
+    }
+})
+_test_validator = compile_schema({
+    'type': 'object',
+    'required': ['phone'],
+    'properties': {
+        'phone': {'type': 'string'},
+        'test_location': {'type': 'boolean'},
+        'test_notifications': {'type': 'boolean'}
+    }
+})
+
+def _load_json(validator):
+    """Decode the request body with orjson and validate it, or return None if invalid"""
+    try:
+        return validator(orjson.loads(request.get_data()))
+    except (orjson.JSONDecodeError, JsonSchemaException):
+        return None
+
+def _encode_active_alerts(alerts):
+    """Encode (alert_id, alert_info) pairs as the active alerts document, one alert per chunk"""
+    # Read the first alert before the first chunk, so a failing query raises
+    # while the route can still answer with a 500
+    first = next(alerts, None)
+    yield b'{"success":true,"active_alerts":{'
+    count = 0
+    if first is not None:
+        for alert_id, alert_info in itertools.chain((first,), alerts):
+            prefix = b',"' if count else b'"'
+            yield prefix + str(alert_id).encode() + b'":' + orjson.dumps(alert_info, option=app.json.option)
+            count += 1
+    yield b'},"count":%d}' % count
+
+def _started(chunks):
+    """Run a chunk generator up to its first chunk now, returning a generator of all its chunks"""
+    first = next(chunks)
+    def resume():
+        yield first
+        yield from chunks
+    return resume()
+
+def _gzip_stream(chunks):
+    """Gzip a stream of byte chunks incrementally"""
+    compressor = zlib.compressobj(app.config['COMPRESS_LEVEL'], zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({
-        'status': 'healthy',
-        'message': 'Emergency Alert System is running',
-        'version': '1.0.0'
-    })
+    return Response(_HEALTH_RESPONSE, mimetype='application/json')
 
 @app.route('/register', methods=['POST'])
 def register_user():
     """Register a new user in the emergency system"""
     try:
-        data = request.get_json()
+        data = _load_json(_register_validator)
         
         # Validate required fields
-        if not data or 'name' not in data or 'phone' not in data:
+        if data is None:
             return jsonify({
                 'success': False,
                 'message': 'Name and phone are required fields'
@@ -53,7 +242,7 @@ def register_user():
         return jsonify(result), status_code
         
     except Exception as e:
-        logger.error(f"Error in register_user: {e}")
+        logger.error("Error in register_user: %s", e)
         return jsonify({
             'success': False,
             'message': f'Internal server error: {str(e)}'
@@ -63,10 +252,10 @@ def register_user():
 def update_location():
     """Update user's current location"""
     try:
-        data = request.get_json()
+        data = _load_json(_location_validator)
         
         # Validate required fields
-        if not data or 'phone' not in data or 'latitude' not in data or 'longitude' not in data:
+        if data is None:
             return jsonify({
                 'success': False,
                 'message': 'Phone, latitude, and longitude are required'
@@ -74,15 +263,43 @@ def update_location():
         
         result = emergency_service.update_user_location(
             phone=data['phone'],
-            latitude=float(data['latitude']),
-            longitude=float(data['longitude'])
+            latitude=data['latitude'],
+            longitude=data['longitude']
         )
         
         status_code = 200 if result['success'] else 400
         return jsonify(result), status_code
         
     except Exception as e:
-        logger.error(f"Error in update_location: {e}")
+        logger.error("Error in update_location: %s", e)
+        return jsonify({
+            'success': False,
+            'message': f'Internal server error: {str(e)}'
+        }), 500
+
+@app.route('/location/update/bulk', methods=['POST'])
+def update_locations_bulk():
+    """Update many users' locations in one request (e.g. batched IoT GPS readings)"""
+    try:
+        data = _load_json(_bulk_location_validator)
+        
+        # Validate required fields
+        if data is None:
+            return jsonify({
+                'success': False,
+                'message': f'A locations list of 1 to {Config.LOCATION_BATCH_MAX} phone, latitude, and longitude entries is required'
+            }), 400
+        
+        result = emergency_service.update_user_locations_bulk([
+            (location['phone'], location['latitude'], location['longitude'])
+            for location in data['locations']
+        ])
+        
+        status_code = 200 if result['success'] else 400
+        return jsonify(result), status_code
+        
+    except Exception as e:
+        logger.error("Error in update_locations_bulk: %s", e)
         return jsonify({
             'success': False,
             'message': f'Internal server error: {str(e)}'
@@ -92,10 +309,10 @@ def update_location():
 def trigger_emergency():
     """Trigger an emergency alert - THIS IS THE MAIN EMERGENCY ENDPOINT"""
     try:
-        data = request.get_json()
+        data = _load_json(_trigger_validator)
         
         # Validate required fields
-        if not data or 'phone' not in data:
+        if data is None:
             return jsonify({
                 'success': False,
                 'message': 'Phone number is required'
@@ -113,7 +330,7 @@ def trigger_emergency():
         return jsonify(result), status_code
         
     except Exception as e:
-        logger.error(f"Error in trigger_emergency: {e}")
+        logger.error("Error in trigger_emergency: %s", e)
         return jsonify({
             'success': False,
             'message': f'Internal server error: {str(e)}'
@@ -123,7 +340,7 @@ def trigger_emergency():
 def cancel_emergency(alert_id):
     """Cancel an active emergency alert"""
     try:
-        data = request.get_json() or {}
+        data = _load_json(_cancel_validator) or {}
         reason = data.get('reason', 'User cancelled')
         
         result = emergency_service.cancel_emergency_alert(alert_id, reason)
@@ -132,7 +349,7 @@ def cancel_emergency(alert_id):
         return jsonify(result), status_code
         
     except Exception as e:
-        logger.error(f"Error in cancel_emergency: {e}")
+        logger.error("Error in cancel_emergency: %s", e)
         return jsonify({
             'success': False,
             'message': f'Internal server error: {str(e)}'
@@ -148,7 +365,7 @@ def get_user_status(phone):
         return jsonify(result), status_code
         
     except Exception as e:
-        logger.error(f"Error in get_user_status: {e}")
+        logger.error("Error in get_user_status: %s", e)
         return jsonify({
             'success': False,
             'message': f'Internal server error: {str(e)}'
@@ -156,13 +373,19 @@ def get_user_status(phone):
 
 @app.route('/alerts/active', methods=['GET'])
 def get_active_alerts():
-    """Get all currently active emergency alerts"""
+    """Stream all currently active emergency alerts"""
     try:
-        result = emergency_service.get_active_alerts()
-        return jsonify(result)
+        body = _started(_encode_active_alerts(emergency_service.iter_active_alerts()))
+        # A q=0 entry means the client refuses gzip, so check quality, not presence
+        if request.accept_encodings['gzip'] > 0:
+            response = Response(_gzip_stream(body), mimetype='application/json')
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            response = Response(body, mimetype='application/json')
+        return response
         
     except Exception as e:
-        logger.error(f"Error in get_active_alerts: {e}")
+        logger.error("Error in get_active_alerts: %s", e)
         return jsonify({
             'success': False,
             'message': f'Internal server error: {str(e)}'
@@ -172,9 +395,9 @@ def get_active_alerts():
 def test_system():
     """Test the emergency system functionality"""
     try:
-        data = request.get_json()
+        data = _load_json(_test_validator)
         
-        if not data or 'phone' not in data:
+        if data is None:
             return jsonify({
                 'success': False,
                 'message': 'Phone number is required for testing'
@@ -189,7 +412,7 @@ def test_system():
         return jsonify(result)
         
     except Exception as e:
-        logger.error(f"Error in test_system: {e}")
+        logger.error("Error in test_system: %s", e)
         return jsonify({
             'success': False,
             'message': f'Internal server error: {str(e)}'
@@ -199,9 +422,9 @@ def test_system():
 def quick_emergency():
     """Quick emergency endpoint - automatically get location and send alert"""
     try:
-        data = request.get_json()
+        data = _load_json(_trigger_validator)
         
-        if not data or 'phone' not in data:
+        if data is None:
             return jsonify({
                 'success': False,
                 'message': 'Phone number is required'
@@ -219,7 +442,7 @@ def quick_emergency():
         return jsonify(result), status_code
         
     except Exception as e:
-        logger.error(f"Error in quick_emergency: {e}")
+        logger.error("Error in quick_emergency: %s", e)
         return jsonify({
             'success': False,
             'message': f'Internal server error: {str(e)}'
@@ -228,77 +451,25 @@ def quick_emergency():
 @app.route('/emergency/help', methods=['GET'])
 def emergency_help():
     """Get help information about using the emergency system"""
-    help_info = {
-        'emergency_system_usage': {
-            'quick_emergency': {
-                'endpoint': '/emergency/quick',
-                'method': 'POST',
-                'description': 'Single-click emergency alert',
-                'required_fields': ['phone'],
-                'optional_fields': ['alert_type'],
-                'example': {
-                    'phone': '+1234567890',
-                    'alert_type': 'medical'
-                }
-            },
-            'emergency_with_location': {
-                'endpoint': '/emergency/trigger',
-                'method': 'POST',
-                'description': 'Emergency alert with specific location',
-                'required_fields': ['phone'],
-                'optional_fields': ['latitude', 'longitude', 'alert_type', 'message'],
-                'example': {
-                    'phone': '+1234567890',
-                    'latitude': 40.7128,
-                    'longitude': -74.0060,
-                    'alert_type': 'medical',
-                    'message': 'Car accident, need immediate help'
-                }
-            }
-        },
-        'alert_types': ['medical', 'fire', 'police', 'general'],
-        'emergency_numbers': {
-            'ambulance': '911',
-            'police': '911',
-            'fire': '911'
-        },
-        'system_features': [
-            'Automatic location detection',
-            'Emergency contact notification',
-            'Hospital/emergency service lookup',
-            'SMS and email alerts',
-            'Real-time location tracking'
-        ]
-    }
-    
-    return jsonify({
-        'success': True,
-        'help': help_info
-    })
+    return Response(_HELP_RESPONSE, mimetype='application/json')
 
 @app.errorhandler(404)
 def not_found(error):
-    return jsonify({
-        'success': False,
-        'message': 'Endpoint not found'
-    }), 404
+    return Response(_NOT_FOUND_RESPONSE, status=404, mimetype='application/json')
 
 @app.errorhandler(405)
 def method_not_allowed(error):
-    return jsonify({
-        'success': False,
-        'message': 'Method not allowed'
-    }), 405
+    return Response(_METHOD_NOT_ALLOWED_RESPONSE, status=405, mimetype='application/json')
 
 @app.errorhandler(500)
 def internal_error(error):
-    return jsonify({
-        'success': False,
-        'message': 'Internal server error'
-    }), 500
+    return Response(_INTERNAL_ERROR_RESPONSE, status=500, mimetype='application/json')
 
 def main():
-    """Main function to run the emergency alert system"""
+    """Run the emergency alert system on Flask's development server
+    
+    Production deployments should use gunicorn (see gunicorn.conf.py).
+    """
     logger.info("Starting Emergency Alert System...")
     
     # Print system information
@@ -340,7 +511,7 @@ def main():
         logger.info("Shutting down Emergency Alert System...")
         emergency_service.shutdown()
     except Exception as e:
-        logger.error(f"Error running server: {e}")
+        logger.error("Error running server: %s", e)
     finally:
         emergency_service.shutdown()
 
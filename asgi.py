@@ -0,0 +1,24 @@
+# ASGI entry point for the Emergency Alert System
+# Run with: uvicorn asgi:app --loop uvloop --http httptools --workers 1
+import os
+from a2wsgi import WSGIMiddleware
+from app import app as flask_app, emergency_service
+
+# Connections are served from the event loop; Flask handlers run on a thread pool
+_wsgi_app = WSGIMiddleware(flask_app, workers=int(os.getenv('ASGI_THREADS', '8')))
+
+async def app(scope, receive, send):
+    """Serve HTTP through the Flask app and shut the service down with the server"""
+    if scope['type'] != 'lifespan':
+        await _wsgi_app(scope, receive, send)
+        return
+    
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            # Cancel alert timers and flush queued location updates
+            emergency_service.shutdown()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
@@ -25,6 +25,10 @@ class Config:
     
     # Database Configuration
     DATABASE_PATH = 'emergency_system.db'
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '8'))  # max open SQLite connections
+    DB_POOL_TIMEOUT = 5  # seconds to wait for a free connection before failing
+    USER_CACHE_SIZE = 10000  # users kept in the phone lookup cache
+    USER_CACHE_TTL = 60  # seconds
     
     # Emergency Services API (Replace with actual emergency services API)
     EMERGENCY_API_ENDPOINT = os.getenv('EMERGENCY_API_ENDPOINT', 'https://api.emergency-services.local')
@@ -32,13 +36,26 @@ class Config:
     
     # Location Services
     GOOGLE_MAPS_API_KEY = os.getenv('GOOGLE_MAPS_API_KEY')
+    NOMINATIM_TIMEOUT = 2  # seconds; geocoding sits on the alert path, so fail fast
+    API_CACHE_SIZE = 512  # recent Places API responses kept in memory
+    API_CACHE_TTL = 60  # seconds
     
     # Alert Configuration
     AUTO_ALERT_TIMEOUT = 30  # seconds before auto-alert
+    ACTIVE_ALERT_CACHE_SIZE = 1024  # recent alerts kept in memory; the database holds all of them
+    ACTIVE_ALERT_PAGE_SIZE = 100  # active alerts read per query when streaming them
     LOCATION_UPDATE_INTERVAL = 5  # seconds
+    GEOCODE_PRECISION = 7  # geohash length for cached reverse geocoding (~150 m cells)
+    GEOCODE_CACHE_SIZE = 50000  # geohash cells kept in memory
+    BULK_GEOCODE_INTERVAL = 1.0  # seconds between bulk Nominatim requests (usage policy: 1/s)
+    BULK_GEOCODE_BUDGET = 10  # seconds a bulk request may spend geocoding uncached points
+    LOCATION_BATCH_SIZE = 100  # max queued location updates written per transaction
+    LOCATION_BATCH_INTERVAL = 0.5  # seconds to wait while filling a batch
+    LOCATION_BATCH_MAX = 500  # max locations accepted by one bulk update request
     
     # Emergency Contact Configuration
     MAX_EMERGENCY_CONTACTS = 5
+    NOTIFICATION_WORKERS = 8  # threads sending SMS/email/API notifications
     
     # Geofencing (for high-risk areas)
     HIGH_RISK_ZONES = [
@@ -1,189 +1,515 @@
 import sqlite3
+import json
+import contextlib
 import datetime
+import threading
+import queue
+import time
+from collections import namedtuple
 from config import Config
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Typed rows for the hot user lookups; fields match the selected columns
+UserRow = namedtuple('UserRow', 'user_id name phone email emergency_contact_1 emergency_contact_2 medical_info')
+LocationRow = namedtuple('LocationRow', 'last_lat last_lng last_address last_loc_ts')
+UserLocationRow = namedtuple('UserLocationRow', UserRow._fields + LocationRow._fields)
 
 class DatabaseManager:
+    # Applied once to every new connection
+    CONNECTION_PRAGMAS = (
+        'PRAGMA journal_mode=WAL',
+        'PRAGMA synchronous=NORMAL',
+        'PRAGMA cache_size=-20000',
+        'PRAGMA temp_store=MEMORY',
+        'PRAGMA mmap_size=268435456',
+        'PRAGMA busy_timeout=5000',
+        'PRAGMA cache_spill=OFF',
+        'PRAGMA journal_size_limit=67108864',  # Truncate the WAL back to 64 MB after checkpoints
+    )
+    
+    # Query text is kept constant so sqlite3's per-connection statement
+    # cache can reuse the prepared statement on every call
+    _SQL_ADD_USER = '''
+        INSERT INTO users (name, phone, email, emergency_contact_1,
+                         emergency_contact_2, medical_info)
+        VALUES (?, ?, ?, ?, ?, ?)
+        RETURNING user_id
+    '''
+    _SQL_GET_USER_BY_PHONE = '''
+        SELECT user_id, name, phone, email, emergency_contact_1,
+               emergency_contact_2, medical_info
+        FROM users
+        WHERE phone = ?
+    '''
+    _SQL_GET_USER_WITH_LOCATION = '''
+        SELECT user_id, name, phone, email, emergency_contact_1,
+               emergency_contact_2, medical_info,
+               last_lat, last_lng, last_address, last_loc_ts
+        FROM users
+        WHERE phone = ?
+    '''
+    _SQL_ADD_LOCATION = '''
+        INSERT INTO location_history (user_id, latitude, longitude, address)
+        VALUES (?, ?, ?, ?)
+        RETURNING location_id
+    '''
+    # executemany() rejects RETURNING, so batched writes use the plain insert
+    _SQL_ADD_LOCATION_BATCH = '''
+        INSERT INTO location_history (user_id, latitude, longitude, address)
+        VALUES (?, ?, ?, ?)
+    '''
+    _SQL_CREATE_ALERT = '''
+        INSERT INTO emergency_alerts (user_id, alert_type, latitude,
+                                    longitude, address, message, location_json)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        RETURNING alert_id
+    '''
+    _SQL_SET_LAST_LOCATION = '''
+        UPDATE users
+        SET last_lat = ?, last_lng = ?, last_address = ?, last_loc_ts = CURRENT_TIMESTAMP
+        WHERE user_id = ?
+    '''
+    _SQL_GET_USER_LOCATION = '''
+        SELECT last_lat, last_lng, last_address, last_loc_ts
+        FROM users
+        WHERE user_id = ? AND last_loc_ts IS NOT NULL
+    '''
+    _SQL_ADD_CONTACT = '''
+        INSERT INTO emergency_contacts (user_id, name, phone, relationship, is_primary)
+        VALUES (?, ?, ?, ?, ?)
+        RETURNING contact_id
+    '''
+    _SQL_GET_CONTACTS = '''
+        SELECT name, phone, relationship, is_primary
+        FROM emergency_contacts
+        WHERE user_id = ?
+        ORDER BY is_primary DESC
+    '''
+    _SQL_GET_ACTIVE_ALERTS_PAGE = '''
+        SELECT a.alert_id, a.user_id, u.phone, a.alert_type, a.latitude, a.longitude,
+               a.address, a.created_at, a.location_json, a.notification_json
+        FROM emergency_alerts a
+        JOIN users u ON a.user_id = u.user_id
+        WHERE a.status = 'active' AND a.alert_id > ?
+        ORDER BY a.alert_id
+        LIMIT ?
+    '''
+    _SQL_GET_ACTIVE_ALERT = '''
+        SELECT a.alert_id, a.user_id, u.phone, a.alert_type, a.latitude, a.longitude,
+               a.address, a.created_at, a.location_json, a.notification_json
+        FROM emergency_alerts a
+        JOIN users u ON a.user_id = u.user_id
+        WHERE a.alert_id = ? AND a.status = 'active'
+    '''
+    _SQL_GET_USER_ACTIVE_ALERT = '''
+        SELECT a.alert_id, a.user_id, u.phone, a.alert_type, a.latitude, a.longitude,
+               a.address, a.created_at, a.location_json, a.notification_json
+        FROM emergency_alerts a
+        JOIN users u ON a.user_id = u.user_id
+        WHERE a.user_id = ? AND a.status = 'active'
+        ORDER BY a.alert_id
+        LIMIT 1
+    '''
+    _SQL_SET_NOTIFICATION_RESULT = '''
+        UPDATE emergency_alerts SET notification_json = ? WHERE alert_id = ?
+    '''
+    _SQL_GET_GEOCODE = 'SELECT address, json FROM geocode_cache WHERE geohash = ?'
+    _SQL_SAVE_GEOCODE = '''
+        INSERT OR REPLACE INTO geocode_cache (geohash, address, json)
+        VALUES (?, ?, ?)
+    '''
+    _SQL_RESOLVE_ALERT = '''
+        UPDATE emergency_alerts
+        SET status = 'resolved', resolved_at = CURRENT_TIMESTAMP
+        WHERE alert_id = ? AND status = 'active'
+    '''
+    
+    # Full schema, applied in a single transaction by init_database
+    _SCHEMA = '''
+        BEGIN IMMEDIATE;
+        
+        -- Users table
+        CREATE TABLE IF NOT EXISTS users (
+            user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            phone TEXT UNIQUE NOT NULL,
+            email TEXT,
+            emergency_contact_1 TEXT,
+            emergency_contact_2 TEXT,
+            medical_info TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            is_active BOOLEAN DEFAULT 1,
+            last_lat REAL,
+            last_lng REAL,
+            last_address TEXT,
+            last_loc_ts TIMESTAMP
+        );
+        
+        -- Location history table
+        CREATE TABLE IF NOT EXISTS location_history (
+            location_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            latitude REAL NOT NULL,
+            longitude REAL NOT NULL,
+            address TEXT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (user_id)
+        );
+        
+        -- Emergency alerts table
+        CREATE TABLE IF NOT EXISTS emergency_alerts (
+            alert_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            alert_type TEXT NOT NULL,
+            latitude REAL NOT NULL,
+            longitude REAL NOT NULL,
+            address TEXT,
+            status TEXT DEFAULT 'active',
+            message TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            resolved_at TIMESTAMP,
+            location_json TEXT,
+            notification_json TEXT,
+            FOREIGN KEY (user_id) REFERENCES users (user_id)
+        );
+        
+        -- Emergency contacts table
+        CREATE TABLE IF NOT EXISTS emergency_contacts (
+            contact_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            name TEXT NOT NULL,
+            phone TEXT NOT NULL,
+            relationship TEXT,
+            is_primary BOOLEAN DEFAULT 0,
+            FOREIGN KEY (user_id) REFERENCES users (user_id)
+        );
+        
+        -- Emergency services table
+        CREATE TABLE IF NOT EXISTS emergency_services (
+            service_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            service_name TEXT NOT NULL,
+            phone TEXT NOT NULL,
+            email TEXT,
+            service_type TEXT,
+            coverage_area TEXT,
+            is_active BOOLEAN DEFAULT 1
+        );
+        
+        -- Reverse geocoding results keyed by geohash cell
+        CREATE TABLE IF NOT EXISTS geocode_cache (
+            geohash TEXT PRIMARY KEY,
+            address TEXT,
+            json TEXT,
+            ts TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        
+        -- Indices for the hot lookups (users.phone is covered by its UNIQUE constraint)
+        CREATE INDEX IF NOT EXISTS idx_loc_user_time
+        ON location_history (user_id, timestamp DESC);
+        
+        CREATE INDEX IF NOT EXISTS idx_alerts_status_time
+        ON emergency_alerts (status, created_at DESC);
+        
+        CREATE INDEX IF NOT EXISTS idx_alerts_user_status
+        ON emergency_alerts (user_id, status);
+        
+        CREATE INDEX IF NOT EXISTS idx_contacts_user
+        ON emergency_contacts (user_id, is_primary DESC);
+        
+        COMMIT;
+    '''
+    
     def __init__(self):
         self.db_path = Config.DATABASE_PATH
+        
+        # Bounded pool of shared connections; idle ones are reused most recent first
+        self._pool = queue.LifoQueue(maxsize=Config.DB_POOL_SIZE)
+        self._pool_size = 0
+        self._pool_lock = threading.Lock()
+        
         self.init_database()
+        
+        # phone -> (expiry, user row) cache for get_user_by_phone
+        self._user_cache = {}
+        self._user_cache_lock = threading.Lock()
+        
+        # Background writer for high-frequency location updates
+        self._location_queue = queue.Queue()
+        self._location_writer = threading.Thread(
+            target=self._write_location_batches, name='location-writer', daemon=True
+        )
+        self._location_writer.start()
+    
+    def _connect(self):
+        """Open a new connection with the standard pragmas applied"""
+        # Autocommit mode: each statement commits on its own
+        conn = sqlite3.connect(self.db_path, check_same_thread=False,
+                               isolation_level=None, cached_statements=256)
+        conn.row_factory = sqlite3.Row  # Rows support access by column name
+        for pragma in self.CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+    
+    @contextlib.contextmanager
+    def connection(self):
+        """Borrow a pooled connection, waiting up to DB_POOL_TIMEOUT while all of them are in use"""
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            with self._pool_lock:
+                grow = self._pool_size < Config.DB_POOL_SIZE
+                if grow:
+                    self._pool_size += 1
+            if grow:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._pool_lock:
+                        self._pool_size -= 1
+                    raise
+            else:
+                try:
+                    conn = self._pool.get(timeout=Config.DB_POOL_TIMEOUT)
+                except queue.Empty:
+                    # Fail loudly rather than hang if connections are starved or leaked
+                    raise sqlite3.OperationalError(
+                        f'No database connection free after {Config.DB_POOL_TIMEOUT}s'
+                    ) from None
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
     
-    def get_connection(self):
-        return sqlite3.connect(self.db_path)
+    @contextlib.contextmanager
+    def transaction(self):
+        """Borrow a pooled connection inside a BEGIN IMMEDIATE ... COMMIT block"""
+        with self.connection() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn
+                conn.execute('COMMIT')
+            except BaseException:
+                # Also covers a failed COMMIT, so no pooled connection is
+                # returned with a transaction still open
+                if conn.in_transaction:
+                    conn.execute('ROLLBACK')
+                raise
     
     def init_database(self):
         """Initialize all required tables"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
+        with self.connection() as conn:
+            conn.executescript(self._SCHEMA)
             
-            # Users table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    user_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    phone TEXT UNIQUE NOT NULL,
-                    email TEXT,
-                    emergency_contact_1 TEXT,
-                    emergency_contact_2 TEXT,
-                    medical_info TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    is_active BOOLEAN DEFAULT 1
-                )
-            ''')
+            # Latest location is denormalized onto users; migrate older databases
+            try:
+                for column in ('last_lat REAL', 'last_lng REAL', 'last_address TEXT', 'last_loc_ts TIMESTAMP'):
+                    conn.execute(f'ALTER TABLE users ADD COLUMN {column}')
+            except sqlite3.OperationalError:
+                pass  # Columns already exist
+            else:
+                conn.execute('''
+                    UPDATE users SET (last_lat, last_lng, last_address, last_loc_ts) = (
+                        SELECT latitude, longitude, address, timestamp
+                        FROM location_history h
+                        WHERE h.user_id = users.user_id
+                        ORDER BY timestamp DESC, location_id DESC
+                        LIMIT 1
+                    )
+                ''')
             
-            # Location history table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS location_history (
-                    location_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER,
-                    latitude REAL NOT NULL,
-                    longitude REAL NOT NULL,
-                    address TEXT,
-                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (user_id) REFERENCES users (user_id)
-                )
-            ''')
-            
-            # Emergency alerts table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS emergency_alerts (
-                    alert_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER,
-                    alert_type TEXT NOT NULL,
-                    latitude REAL NOT NULL,
-                    longitude REAL NOT NULL,
-                    address TEXT,
-                    status TEXT DEFAULT 'active',
-                    message TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    resolved_at TIMESTAMP,
-                    FOREIGN KEY (user_id) REFERENCES users (user_id)
-                )
-            ''')
-            
-            # Emergency contacts table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS emergency_contacts (
-                    contact_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER,
-                    name TEXT NOT NULL,
-                    phone TEXT NOT NULL,
-                    relationship TEXT,
-                    is_primary BOOLEAN DEFAULT 0,
-                    FOREIGN KEY (user_id) REFERENCES users (user_id)
-                )
-            ''')
-            
-            # Emergency services table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS emergency_services (
-                    service_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    service_name TEXT NOT NULL,
-                    phone TEXT NOT NULL,
-                    email TEXT,
-                    service_type TEXT,
-                    coverage_area TEXT,
-                    is_active BOOLEAN DEFAULT 1
-                )
-            ''')
-            
-            conn.commit()
+            # Alert details are persisted for the active alert queries
+            try:
+                for column in ('location_json TEXT', 'notification_json TEXT'):
+                    conn.execute(f'ALTER TABLE emergency_alerts ADD COLUMN {column}')
+            except sqlite3.OperationalError:
+                pass  # Columns already exist
     
-    def add_user(self, name, phone, email=None, emergency_contact_1=None, 
+    def add_user(self, name, phone, email=None, emergency_contact_1=None,
                  emergency_contact_2=None, medical_info=None):
         """Add a new user to the system"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO users (name, phone, email, emergency_contact_1, 
-                                 emergency_contact_2, medical_info)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (name, phone, email, emergency_contact_1, emergency_contact_2, medical_info))
-            return cursor.lastrowid
+        with self.transaction() as conn:
+            user_id = conn.execute(
+                self._SQL_ADD_USER,
+                (name, phone, email, emergency_contact_1, emergency_contact_2, medical_info)
+            ).fetchone()[0]
+        with self._user_cache_lock:
+            self._user_cache.pop(phone, None)
+        return user_id
     
     def get_user_by_phone(self, phone):
-        """Get user information by phone number"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT * FROM users WHERE phone = ?', (phone,))
-            return cursor.fetchone()
+        """Get user information by phone number, served from cache when fresh"""
+        now = time.monotonic()
+        cached = self._user_cache.get(phone)
+        if cached and cached[0] > now:
+            return cached[1]
+        
+        with self.connection() as conn:
+            row = conn.execute(self._SQL_GET_USER_BY_PHONE, (phone,)).fetchone()
+        user = UserRow._make(row) if row else None
+        if user:
+            with self._user_cache_lock:
+                self._user_cache.pop(phone, None)
+                if len(self._user_cache) >= Config.USER_CACHE_SIZE:
+                    # Evict the oldest entry (dicts keep insertion order)
+                    self._user_cache.pop(next(iter(self._user_cache)))
+                self._user_cache[phone] = (now + Config.USER_CACHE_TTL, user)
+        return user
+    
+    def get_user_with_location(self, phone):
+        """Get user information and latest location by phone number in one query"""
+        # Not cached: the location columns change with every update
+        with self.connection() as conn:
+            row = conn.execute(self._SQL_GET_USER_WITH_LOCATION, (phone,)).fetchone()
+        return UserLocationRow._make(row) if row else None
     
     def update_user_location(self, user_id, latitude, longitude, address=None):
         """Update user's current location"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO location_history (user_id, latitude, longitude, address)
-                VALUES (?, ?, ?, ?)
-            ''', (user_id, latitude, longitude, address))
-            return cursor.lastrowid
-    
-    def create_emergency_alert(self, user_id, alert_type, latitude, longitude, 
-                             address=None, message=None):
+        with self.transaction() as conn:
+            cursor = conn.execute(self._SQL_ADD_LOCATION, (user_id, latitude, longitude, address))
+            location_id = cursor.fetchone()[0]
+            conn.execute(self._SQL_SET_LAST_LOCATION, (latitude, longitude, address, user_id))
+        return location_id
+    
+    def queue_location_update(self, user_id, latitude, longitude, address=None):
+        """Queue a location update to be written with the next batch"""
+        self._location_queue.put((user_id, latitude, longitude, address))
+    
+    def _write_location_batches(self):
+        """Drain queued location updates, committing each batch in one transaction"""
+        running = True
+        while running:
+            batch = [self._location_queue.get()]
+            deadline = time.monotonic() + Config.LOCATION_BATCH_INTERVAL
+            while len(batch) < Config.LOCATION_BATCH_SIZE:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._location_queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            
+            # None is the shutdown sentinel queued by close()
+            if None in batch:
+                running = False
+                batch = [row for row in batch if row is not None]
+            if not batch:
+                continue
+            
+            try:
+                with self.transaction() as conn:
+                    conn.executemany(self._SQL_ADD_LOCATION_BATCH, batch)
+                    conn.executemany(
+                        self._SQL_SET_LAST_LOCATION,
+                        ((lat, lng, address, user_id) for user_id, lat, lng, address in batch)
+                    )
+            except Exception as e:
+                logger.error("Error writing %d location updates: %s", len(batch), e)
+    
+    def close(self):
+        """Flush queued location updates and stop the background writer"""
+        if self._location_writer.is_alive():
+            self._location_queue.put(None)
+            self._location_writer.join()
+    
+    def create_emergency_alert(self, user_id, alert_type, latitude, longitude,
+                             address=None, message=None, location=None):
         """Create a new emergency alert"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO emergency_alerts (user_id, alert_type, latitude, 
-                                            longitude, address, message)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (user_id, alert_type, latitude, longitude, address, message))
-            return cursor.lastrowid
+        location_json = json.dumps(location) if location is not None else None
+        with self.transaction() as conn:
+            return conn.execute(
+                self._SQL_CREATE_ALERT,
+                (user_id, alert_type, latitude, longitude, address, message, location_json)
+            ).fetchone()[0]
     
     def get_user_location(self, user_id):
         """Get user's latest location"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT latitude, longitude, address, timestamp 
-                FROM location_history 
-                WHERE user_id = ? 
-                ORDER BY timestamp DESC 
-                LIMIT 1
-            ''', (user_id,))
-            return cursor.fetchone()
+        with self.connection() as conn:
+            row = conn.execute(self._SQL_GET_USER_LOCATION, (user_id,)).fetchone()
+        return LocationRow._make(row) if row else None
     
     def add_emergency_contact(self, user_id, name, phone, relationship=None, is_primary=False):
         """Add emergency contact for a user"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO emergency_contacts (user_id, name, phone, relationship, is_primary)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (user_id, name, phone, relationship, is_primary))
-            return cursor.lastrowid
+        with self.connection() as conn:
+            return conn.execute(
+                self._SQL_ADD_CONTACT, (user_id, name, phone, relationship, is_primary)
+            ).fetchone()[0]
     
     def get_emergency_contacts(self, user_id):
         """Get all emergency contacts for a user"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT name, phone, relationship, is_primary 
-                FROM emergency_contacts 
-                WHERE user_id = ?
-                ORDER BY is_primary DESC
-            ''', (user_id,))
-            return cursor.fetchall()
-    
-    def get_active_alerts(self):
-        """Get all active emergency alerts"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT a.*, u.name, u.phone 
-                FROM emergency_alerts a
-                JOIN users u ON a.user_id = u.user_id
-                WHERE a.status = 'active'
-                ORDER BY a.created_at DESC
-            ''')
-            return cursor.fetchall()
+        with self.connection() as conn:
+            return conn.execute(self._SQL_GET_CONTACTS, (user_id,)).fetchall()
+    
+    @staticmethod
+    def _alert_info(row):
+        """Build the (alert_id, alert_info) pair for an active alert row"""
+        if row['location_json']:
+            location = json.loads(row['location_json'])
+        else:
+            # Alerts created before location_json was added
+            location = {
+                'latitude': row['latitude'],
+                'longitude': row['longitude'],
+                'address': row['address']
+            }
+        return row['alert_id'], {
+            'user_id': row['user_id'],
+            'phone': row['phone'],
+            'alert_type': row['alert_type'],
+            'location': location,
+            'timestamp': location.get('timestamp', row['created_at']),
+            'notification_result': json.loads(row['notification_json']) if row['notification_json'] else None
+        }
+    
+    def iter_active_alerts(self):
+        """Yield (alert_id, alert_info) pairs of all active alerts, one page of rows at a time"""
+        page_size = Config.ACTIVE_ALERT_PAGE_SIZE
+        last_id = 0
+        while True:
+            # Each page is read on a briefly borrowed connection, so a slow
+            # reader never holds a pooled connection or a WAL snapshot
+            with self.connection() as conn:
+                rows = conn.execute(self._SQL_GET_ACTIVE_ALERTS_PAGE, (last_id, page_size)).fetchall()
+            for row in rows:
+                yield self._alert_info(row)
+            if len(rows) < page_size:
+                return
+            last_id = rows[-1]['alert_id']
+    
+    def get_active_alert(self, alert_id):
+        """Get an active alert's info, or None if it is resolved or unknown"""
+        with self.connection() as conn:
+            row = conn.execute(self._SQL_GET_ACTIVE_ALERT, (alert_id,)).fetchone()
+        return self._alert_info(row)[1] if row else None
+    
+    def get_user_active_alert(self, user_id):
+        """Get a user's oldest active alert as an (alert_id, alert_info) pair"""
+        with self.connection() as conn:
+            row = conn.execute(self._SQL_GET_USER_ACTIVE_ALERT, (user_id,)).fetchone()
+        return self._alert_info(row) if row else None
+    
+    def set_notification_result(self, alert_id, result):
+        """Store the outcome of an alert's notifications"""
+        with self.transaction() as conn:
+            conn.execute(self._SQL_SET_NOTIFICATION_RESULT, (json.dumps(result), alert_id))
+    
+    def get_geocode(self, geohash):
+        """Get a stored reverse geocoding result for a geohash cell"""
+        with self.connection() as conn:
+            row = conn.execute(self._SQL_GET_GEOCODE, (geohash,)).fetchone()
+        return json.loads(row['json']) if row else None
+    
+    def save_geocode(self, geohash, location_data):
+        """Store a reverse geocoding result for a geohash cell"""
+        with self.connection() as conn:
+            conn.execute(
+                self._SQL_SAVE_GEOCODE,
+                (geohash, location_data.get('address'), json.dumps(location_data))
+            )
     
     def resolve_alert(self, alert_id):
-        """Mark an emergency alert as resolved"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                UPDATE emergency_alerts 
-                SET status = 'resolved', resolved_at = CURRENT_TIMESTAMP
-                WHERE alert_id = ?
-            ''', (alert_id,))
-            return cursor.rowcount > 0
\ No newline at end of file
+        """Mark an active emergency alert as resolved; False if it was not active"""
+        with self.transaction() as conn:
+            return conn.execute(self._SQL_RESOLVE_ALERT, (alert_id,)).rowcount > 0
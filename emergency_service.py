@@ -1,22 +1,62 @@
-import datetime
+import heapq
 import threading
 import time
-from database import DatabaseManager
+from collections import OrderedDict
+from functools import lru_cache
+from types import MappingProxyType
+from concurrent.futures import ThreadPoolExecutor
+from database import DatabaseManager, UserRow
 from location_service import LocationService
 from notification_service import NotificationService
 from config import Config
+import geo
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Local time, formatted with time.strftime (no datetime object per alert)
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Runs alert-path lookups (e.g. reverse geocoding) alongside database work
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='alert-lookup')
+
+@lru_cache(maxsize=Config.USER_CACHE_SIZE)
+def _user_profile(user):
+    """Read-only notification payload for a UserRow, built once per distinct row"""
+    # Keyed by the row's values, so a changed profile simply gets a new entry
+    return MappingProxyType(user._asdict())
+
 class EmergencyService:
-    def __init__(self):
-        self.db = DatabaseManager()
+    def __init__(self, db=None):
+        # Share a DatabaseManager (and its connection pool) when one is given
+        self.db = db or DatabaseManager()
         self.location_service = LocationService()
         self.notification_service = NotificationService()
-        self.active_alerts = {}
-        self.monitoring_threads = {}
+        # Write-through cache of recently triggered alerts; the
+        # emergency_alerts table is the source of truth
+        self.active_alerts = OrderedDict()
+        self._alerts_lock = threading.Lock()
+        
+        # Reverse geocoding results per geohash cell, backed by the geocode_cache table
+        self._geocode_cell = lru_cache(maxsize=Config.GEOCODE_CACHE_SIZE)(self._lookup_geocode_cell)
+        # Bulk updates geocode one point at a time, sharing a Nominatim request budget
+        self._bulk_geocode_lock = threading.Lock()
+        self._bulk_next_request = 0.0
+        self.notification_executor = ThreadPoolExecutor(
+            max_workers=Config.NOTIFICATION_WORKERS, thread_name_prefix='notification'
+        )
+        
+        # Follow-ups for all alerts are scheduled on one thread: a min-heap of
+        # (deadline, alert_id), plus a cancel event per pending follow-up
+        self._follow_ups = []
+        self._follow_up_events = {}
+        self._follow_up_cv = threading.Condition()
+        self._running = True
+        self._follow_up_thread = threading.Thread(
+            target=self._run_follow_ups, name='alert-monitor', daemon=True
+        )
+        self._follow_up_thread.start()
     
     def register_user(self, name, phone, email=None, emergency_contact_1=None, 
                      emergency_contact_2=None, medical_info=None):
@@ -25,7 +65,7 @@ class EmergencyService:
             # Check if user already exists
             existing_user = self.db.get_user_by_phone(phone)
             if existing_user:
-                logger.warning(f"User with phone {phone} already exists")
+                logger.warning("User with phone %s already exists", phone)
                 return {'success': False, 'message': 'User already registered'}
             
             # Add user to database
@@ -38,7 +78,7 @@ class EmergencyService:
                 medical_info=medical_info
             )
             
-            logger.info(f"User {name} registered successfully with ID {user_id}")
+            logger.info("User %s registered successfully with ID %s", name, user_id)
             return {
                 'success': True,
                 'user_id': user_id,
@@ -46,7 +86,7 @@ class EmergencyService:
             }
             
         except Exception as e:
-            logger.error(f"Error registering user: {e}")
+            logger.error("Error registering user: %s", e)
             return {'success': False, 'message': f'Registration failed: {str(e)}'}
     
     def update_user_location(self, phone, latitude, longitude):
@@ -57,68 +97,162 @@ class EmergencyService:
             if not user:
                 return {'success': False, 'message': 'User not found'}
             
-            user_id = user[0]  # user_id is the first column
+            user_id = user.user_id
             
             # Get address from coordinates
-            location_data = self.location_service.get_location_from_coordinates(latitude, longitude)
+            location_data = self.reverse_geocode(latitude, longitude)
             address = location_data.get('address') if location_data else None
             
-            # Update location in database
-            location_id = self.db.update_user_location(user_id, latitude, longitude, address)
-            
             # Check if user is in a high-risk zone
             high_risk = self.location_service.is_in_high_risk_zone(latitude, longitude)
             
+            # Queue the location for the next batched database write
+            self.db.queue_location_update(user_id, latitude, longitude, address)
+            
             return {
                 'success': True,
-                'location_id': location_id,
                 'address': address,
                 'high_risk_zone': high_risk,
                 'message': 'Location updated successfully'
             }
             
         except Exception as e:
-            logger.error(f"Error updating location: {e}")
+            logger.error("Error updating location: %s", e)
             return {'success': False, 'message': f'Location update failed: {str(e)}'}
     
+    def update_user_locations_bulk(self, points):
+        """Update many (phone, latitude, longitude) locations in one pass"""
+        try:
+            # Resolve users first so unknown phones cost no geocoding
+            users = [self.db.get_user_by_phone(phone) for phone, _, _ in points]
+            latitudes = [latitude for user, (_, latitude, _) in zip(users, points) if user]
+            longitudes = [longitude for user, (_, _, longitude) in zip(users, points) if user]
+            
+            # Check all known users' points against the high-risk zones in one vectorized call
+            high_risk = iter(self.location_service.are_in_high_risk_zone(latitudes, longitudes))
+            
+            # Addresses are looked up serially on this thread, keeping _executor free for alerts
+            addresses = iter(self._reverse_geocode_bulk(latitudes, longitudes))
+            
+            results = []
+            for user, (phone, latitude, longitude) in zip(users, points):
+                if not user:
+                    results.append({'phone': phone, 'success': False, 'message': 'User not found'})
+                    continue
+                
+                address = next(addresses)
+                in_zone = next(high_risk)
+                self.db.queue_location_update(user.user_id, latitude, longitude, address)
+                results.append({
+                    'phone': phone,
+                    'success': True,
+                    'address': address,
+                    'high_risk_zone': bool(in_zone)
+                })
+            
+            return {
+                'success': True,
+                'results': results,
+                'count': len(results),
+                'message': 'Locations updated successfully'
+            }
+            
+        except Exception as e:
+            logger.error("Error updating locations in bulk: %s", e)
+            return {'success': False, 'message': f'Bulk location update failed: {str(e)}'}
+    
+    def reverse_geocode(self, latitude, longitude):
+        """Get the address for coordinates, reusing results within the same geohash cell"""
+        geohash = geo.encode_geohash(latitude, longitude, Config.GEOCODE_PRECISION)
+        try:
+            address = self._geocode_cell(geohash)
+        except LookupError:
+            return None
+        return {
+            'latitude': latitude,
+            'longitude': longitude,
+            'address': address,
+            'method': 'coordinates'
+        }
+    
+    def _reverse_geocode_bulk(self, latitudes, longitudes):
+        """Addresses for bulk points, requesting uncached cells from Nominatim at most once per BULK_GEOCODE_INTERVAL"""
+        deadline = time.monotonic() + Config.BULK_GEOCODE_BUDGET
+        addresses = []
+        with self._bulk_geocode_lock:
+            for latitude, longitude in zip(latitudes, longitudes):
+                geohash = geo.encode_geohash(latitude, longitude, Config.GEOCODE_PRECISION)
+                cached = self.db.get_geocode(geohash)
+                if cached is not None:
+                    addresses.append(cached.get('address'))
+                    continue
+                
+                wait = self._bulk_next_request - time.monotonic()
+                if time.monotonic() + max(wait, 0) >= deadline:
+                    # Out of budget: leave the address empty rather than stall the request
+                    addresses.append(None)
+                    continue
+                if wait > 0:
+                    time.sleep(wait)
+                self._bulk_next_request = time.monotonic() + Config.BULK_GEOCODE_INTERVAL
+                try:
+                    addresses.append(self._geocode_cell(geohash))
+                except LookupError:
+                    addresses.append(None)
+        return addresses
+    
+    def _lookup_geocode_cell(self, geohash):
+        """Reverse geocode the center of a geohash cell, checking the database first"""
+        location_data = self.db.get_geocode(geohash)
+        if location_data is None:
+            cell_lat, cell_lng = geo.decode_geohash(geohash)
+            location_data = self.location_service.get_location_from_coordinates(cell_lat, cell_lng)
+            if not location_data:
+                # Raise so lru_cache does not remember the failure
+                raise LookupError(geohash)
+            self.db.save_geocode(geohash, location_data)
+        return location_data.get('address')
+    
     def trigger_emergency_alert(self, phone, alert_type="medical", message=None, 
                                latitude=None, longitude=None):
         """Trigger an emergency alert for a user"""
         try:
-            # Get user information
-            user = self.db.get_user_by_phone(phone)
+            # Start reverse geocoding right away so it overlaps the user lookup; an
+            # alert needs the exact point's address, not its geohash cell's
+            geocode_future = None
+            if latitude is not None and longitude is not None:
+                geocode_future = _executor.submit(
+                    self.location_service.get_location_from_coordinates, latitude, longitude
+                )
+            
+            # Get user information, with the last known location when no coordinates were given
+            if geocode_future is None:
+                user = self.db.get_user_with_location(phone)
+            else:
+                user = self.db.get_user_by_phone(phone)
             if not user:
                 return {'success': False, 'message': 'User not found'}
             
-            user_id = user[0]
-            user_data = {
-                'user_id': user_id,
-                'name': user[1],
-                'phone': user[2],
-                'email': user[3],
-                'emergency_contact_1': user[4],
-                'emergency_contact_2': user[5],
-                'medical_info': user[6]
-            }
+            user_id = user.user_id
+            user_data = _user_profile(UserRow._make(user[:len(UserRow._fields)]))
             
             # Get location (use provided coordinates or last known location)
-            if latitude is not None and longitude is not None:
-                location_data = self.location_service.get_location_from_coordinates(latitude, longitude)
+            if geocode_future is not None:
+                location_data = geocode_future.result()
                 if location_data:
                     # Update location in database
                     self.db.update_user_location(user_id, latitude, longitude, location_data.get('address'))
                 else:
                     location_data = {'latitude': latitude, 'longitude': longitude}
             else:
-                # Get last known location
-                last_location = self.db.get_user_location(user_id)
-                if last_location:
-                    latitude, longitude = last_location[0], last_location[1]
+                # Use last known location
+                if user.last_loc_ts is not None:
+                    latitude, longitude = user.last_lat, user.last_lng
                     location_data = {
                         'latitude': latitude,
                         'longitude': longitude,
-                        'address': last_location[2],
-                        'timestamp': last_location[3]
+                        'address': user.last_address,
+                        'timestamp': user.last_loc_ts
                     }
                 else:
                     # Try to get location from IP as fallback
@@ -133,12 +267,14 @@ class EmergencyService:
                         return {'success': False, 'message': 'No location data available'}
             
             # Format location for emergency services
+            # Coordinates sent with the trigger were just geocoded; don't retry a failed lookup
             emergency_location = self.location_service.format_location_for_emergency(
-                latitude, longitude, location_data.get('address')
+                latitude, longitude, location_data.get('address'),
+                lookup_address=geocode_future is None
             )
             
             # Add timestamp
-            emergency_location['timestamp'] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            emergency_location['timestamp'] = time.strftime(TIMESTAMP_FORMAT)
             
             # Create emergency alert in database
             alert_id = self.db.create_emergency_alert(
@@ -147,71 +283,109 @@ class EmergencyService:
                 latitude=latitude,
                 longitude=longitude,
                 address=emergency_location.get('address'),
-                message=message
+                message=message,
+                location=emergency_location
             )
             
-            # Send emergency notifications
-            notification_result = self.notification_service.send_emergency_alert(
-                user_data=user_data,
-                location_data=emergency_location,
-                alert_type=alert_type,
-                message=message
-            )
-            
-            # Store active alert
-            self.active_alerts[alert_id] = {
+            # Cache active alert; notification_result is filled in once sent
+            self._cache_alert(alert_id, {
                 'user_id': user_id,
                 'phone': phone,
                 'alert_type': alert_type,
                 'location': emergency_location,
                 'timestamp': emergency_location['timestamp'],
-                'notification_result': notification_result
-            }
+                'notification_result': None
+            })
+            
+            # Send emergency notifications in the background so the caller
+            # is not held up by SMS/email round trips
+            notification_future = self.notification_executor.submit(
+                self.notification_service.send_emergency_alert,
+                user_data=user_data,
+                location_data=emergency_location,
+                alert_type=alert_type,
+                message=message
+            )
+            notification_future.add_done_callback(
+                lambda future: self._record_notification_result(alert_id, future)
+            )
             
             # Start monitoring thread for this alert
             self._start_alert_monitoring(alert_id)
             
-            logger.critical(f"EMERGENCY ALERT TRIGGERED - Alert ID: {alert_id}, User: {user_data['name']}, Location: {latitude}, {longitude}")
+            logger.critical("EMERGENCY ALERT TRIGGERED - Alert ID: %s, User: %s, Location: %s, %s", alert_id, user_data['name'], latitude, longitude)
             
             return {
                 'success': True,
                 'alert_id': alert_id,
                 'location': emergency_location,
-                'notification_result': notification_result,
+                'notification_status': 'queued',
                 'message': 'Emergency alert sent successfully'
             }
             
         except Exception as e:
-            logger.error(f"Error triggering emergency alert: {e}")
+            logger.error("Error triggering emergency alert: %s", e)
             return {'success': False, 'message': f'Emergency alert failed: {str(e)}'}
     
+    def _record_notification_result(self, alert_id, future):
+        """Store the outcome of a background notification on its active alert"""
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.error("Error sending notifications for alert %s: %s", alert_id, e)
+            result = False
+        
+        self.db.set_notification_result(alert_id, result)
+        alert_info = self.active_alerts.get(alert_id)
+        if alert_info:
+            alert_info['notification_result'] = result
+    
+    def _cache_alert(self, alert_id, alert_info):
+        """Add an alert to the in-memory cache, evicting the oldest beyond its size"""
+        with self._alerts_lock:
+            self.active_alerts[alert_id] = alert_info
+            self.active_alerts.move_to_end(alert_id)
+            while len(self.active_alerts) > Config.ACTIVE_ALERT_CACHE_SIZE:
+                self.active_alerts.popitem(last=False)
+    
+    def get_alert(self, alert_id):
+        """Get an active alert's info from the cache, falling back to the database"""
+        alert_info = self.active_alerts.get(alert_id)
+        if alert_info is None:
+            alert_info = self.db.get_active_alert(alert_id)
+            if alert_info is not None:
+                self._cache_alert(alert_id, alert_info)
+        return alert_info
+    
     def cancel_emergency_alert(self, alert_id, reason="User cancelled"):
         """Cancel an active emergency alert"""
         try:
-            if alert_id not in self.active_alerts:
+            # Get alert info
+            alert_info = self.get_alert(alert_id)
+            if alert_info is None:
                 return {'success': False, 'message': 'Alert not found or already resolved'}
             
-            # Mark alert as resolved in database
-            self.db.resolve_alert(alert_id)
-            
-            # Get alert info
-            alert_info = self.active_alerts[alert_id]
+            # Cancel the follow-up first so it cannot go out while we clean up
+            with self._follow_up_cv:
+                cancel_event = self._follow_up_events.pop(alert_id, None)
+            if cancel_event is not None:
+                cancel_event.set()
             
-            # Stop monitoring thread
-            if alert_id in self.monitoring_threads:
-                self.monitoring_threads[alert_id].cancel()
-                del self.monitoring_threads[alert_id]
+            # Mark alert as resolved in database; another worker may have beaten us to it
+            resolved = self.db.resolve_alert(alert_id)
             
             # Remove from active alerts
-            del self.active_alerts[alert_id]
+            with self._alerts_lock:
+                self.active_alerts.pop(alert_id, None)
             
-            # Send cancellation notification
-            user = self.db.get_user_by_phone(alert_info['phone'])
-            if user:
-                cancellation_message = f"Emergency alert has been cancelled. Reason: {reason}"
-                self.notification_service.send_sms(alert_info['phone'], cancellation_message)
+            if not resolved:
+                return {'success': False, 'message': 'Alert not found or already resolved'}
+            
+            # Send cancellation notification to the phone the alert was raised from
+            cancellation_message = f"Emergency alert has been cancelled. Reason: {reason}"
+            self.notification_service.send_sms(alert_info['phone'], cancellation_message)
             
-            logger.info(f"Emergency alert {alert_id} cancelled. Reason: {reason}")
+            logger.info("Emergency alert %s cancelled. Reason: %s", alert_id, reason)
             
             return {
                 'success': True,
@@ -219,92 +393,109 @@ class EmergencyService:
             }
             
         except Exception as e:
-            logger.error(f"Error cancelling alert: {e}")
+            logger.error("Error cancelling alert: %s", e)
             return {'success': False, 'message': f'Failed to cancel alert: {str(e)}'}
     
     def get_user_status(self, phone):
         """Get current status of a user"""
         try:
-            user = self.db.get_user_by_phone(phone)
+            # Get user information along with the latest location
+            user = self.db.get_user_with_location(phone)
             if not user:
                 return {'success': False, 'message': 'User not found'}
             
-            user_id = user[0]
-            
-            # Get latest location
-            location = self.db.get_user_location(user_id)
+            user_id = user.user_id
             
             # Get emergency contacts
             contacts = self.db.get_emergency_contacts(user_id)
             
             # Check for active alerts
             active_alert = None
-            for alert_id, alert_info in self.active_alerts.items():
-                if alert_info['user_id'] == user_id:
-                    active_alert = {
-                        'alert_id': alert_id,
-                        'alert_type': alert_info['alert_type'],
-                        'timestamp': alert_info['timestamp']
-                    }
-                    break
+            user_alert = self.db.get_user_active_alert(user_id)
+            if user_alert:
+                alert_id, alert_info = user_alert
+                active_alert = {
+                    'alert_id': alert_id,
+                    'alert_type': alert_info['alert_type'],
+                    'timestamp': alert_info['timestamp']
+                }
             
             return {
                 'success': True,
                 'user_info': {
-                    'name': user[1],
-                    'phone': user[2],
-                    'email': user[3],
-                    'medical_info': user[6]
+                    'name': user.name,
+                    'phone': user.phone,
+                    'email': user.email,
+                    'medical_info': user.medical_info
                 },
                 'location': {
-                    'latitude': location[0] if location else None,
-                    'longitude': location[1] if location else None,
-                    'address': location[2] if location else None,
-                    'last_update': location[3] if location else None
+                    'latitude': user.last_lat,
+                    'longitude': user.last_lng,
+                    'address': user.last_address,
+                    'last_update': user.last_loc_ts
                 },
-                'emergency_contacts': contacts,
+                'emergency_contacts': [tuple(contact) for contact in contacts],
                 'active_alert': active_alert
             }
             
         except Exception as e:
-            logger.error(f"Error getting user status: {e}")
+            logger.error("Error getting user status: %s", e)
             return {'success': False, 'message': f'Failed to get status: {str(e)}'}
     
     def _start_alert_monitoring(self, alert_id):
-        """Start a monitoring thread for an emergency alert"""
-        def monitor_alert():
-            time.sleep(Config.AUTO_ALERT_TIMEOUT)
-            
-            if alert_id in self.active_alerts:
-                alert_info = self.active_alerts[alert_id]
-                
-                # Send follow-up notification
-                follow_up_message = "Emergency services have been dispatched to your location. If this was sent in error, please contact emergency services immediately."
-                
-                self.notification_service.send_sms(
-                    alert_info['phone'],
-                    follow_up_message,
-                    emergency=True
-                )
-                
-                logger.info(f"Follow-up notification sent for alert {alert_id}")
-        
-        # Create and start monitoring thread
-        timer = threading.Timer(Config.AUTO_ALERT_TIMEOUT, monitor_alert)
-        timer.start()
-        self.monitoring_threads[alert_id] = timer
+        """Schedule the follow-up notification for an emergency alert"""
+        with self._follow_up_cv:
+            self._follow_up_events[alert_id] = threading.Event()
+            heapq.heappush(self._follow_ups, (time.monotonic() + Config.AUTO_ALERT_TIMEOUT, alert_id))
+            self._follow_up_cv.notify()
+    
+    def _run_follow_ups(self):
+        """Wait for the earliest follow-up deadline and hand due alerts to the notification pool"""
+        while True:
+            with self._follow_up_cv:
+                while self._running:
+                    if self._follow_ups:
+                        timeout = self._follow_ups[0][0] - time.monotonic()
+                        if timeout <= 0:
+                            break
+                    else:
+                        timeout = None
+                    self._follow_up_cv.wait(timeout)
+                if not self._running:
+                    return
+                _, alert_id = heapq.heappop(self._follow_ups)
+                cancel_event = self._follow_up_events.get(alert_id)
+                if cancel_event is None:
+                    continue  # Cancelled
+            self.notification_executor.submit(self._send_follow_up, alert_id, cancel_event)
     
-    def get_active_alerts(self):
-        """Get all currently active emergency alerts"""
+    def _send_follow_up(self, alert_id, cancel_event):
+        """Send the follow-up notification unless the alert was cancelled meanwhile"""
         try:
-            return {
-                'success': True,
-                'active_alerts': self.active_alerts,
-                'count': len(self.active_alerts)
-            }
+            # Ask the database, since another worker may have cancelled the alert
+            alert_info = self.db.get_active_alert(alert_id)
+            if alert_info is None or cancel_event.is_set():
+                return
+            
+            # Send follow-up notification
+            follow_up_message = "Emergency services have been dispatched to your location. If this was sent in error, please contact emergency services immediately."
+            
+            self.notification_service.send_sms(
+                alert_info['phone'],
+                follow_up_message,
+                emergency=True
+            )
+            
+            logger.info("Follow-up notification sent for alert %s", alert_id)
         except Exception as e:
-            logger.error(f"Error getting active alerts: {e}")
-            return {'success': False, 'message': f'Failed to get alerts: {str(e)}'}
+            logger.error("Error sending follow-up for alert %s: %s", alert_id, e)
+        finally:
+            with self._follow_up_cv:
+                self._follow_up_events.pop(alert_id, None)
+    
+    def iter_active_alerts(self):
+        """Iterate over (alert_id, alert_info) pairs of all active alerts"""
+        return self.db.iter_active_alerts()
     
     def test_system(self, phone, test_location=True, test_notifications=True):
         """Test the emergency system functionality"""
@@ -331,8 +522,8 @@ class EmergencyService:
             # Test notifications
             if test_notifications:
                 user_data = {
-                    'phone': user[2],
-                    'email': user[3]
+                    'phone': user.phone,
+                    'email': user.email
                 }
                 
                 notification_results = self.notification_service.send_test_notification(
@@ -348,17 +539,29 @@ class EmergencyService:
             return results
             
         except Exception as e:
-            logger.error(f"Error testing system: {e}")
+            logger.error("Error testing system: %s", e)
             return {'success': False, 'message': f'System test failed: {str(e)}'}
     
     def shutdown(self):
         """Shutdown the emergency service and clean up resources"""
         try:
-            # Cancel all monitoring threads
-            for timer in self.monitoring_threads.values():
-                timer.cancel()
+            # Stop the follow-up scheduler; pending follow-ups are dropped
+            with self._follow_up_cv:
+                self._running = False
+                self._follow_up_cv.notify()
+            self._follow_up_thread.join()
+            
+            # Let queued notifications finish sending
+            self.notification_executor.shutdown(wait=True)
+            
+            # Write out any queued location updates
+            self.db.close()
+            
+            # Release pooled HTTP connections
+            self.location_service.close()
+            self.notification_service.close()
             
             logger.info("Emergency service shutdown completed")
             
         except Exception as e:
-            logger.error(f"Error during shutdown: {e}")
\ No newline at end of file
+            logger.error("Error during shutdown: %s", e)
\ No newline at end of file
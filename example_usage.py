@@ -6,9 +6,9 @@ This script demonstrates how to use the emergency alert system programmatically.
 It shows various scenarios including user registration, location updates, and emergency triggers.
 """
 
-import requests
+import aiohttp
+import asyncio
 import json
-import time
 
 # Configuration
 BASE_URL = "http://localhost:5000"
@@ -21,33 +21,31 @@ DEMO_USER = {
     "medical_info": "Type 1 Diabetes, Blood Type O+"
 }
 
-def make_request(method, endpoint, data=None):
+async def make_request(session, method, endpoint, data=None):
     """Helper function to make HTTP requests"""
     url = f"{BASE_URL}{endpoint}"
-    headers = {'Content-Type': 'application/json'}
     
     try:
-        if method.upper() == 'GET':
-            response = requests.get(url)
-        elif method.upper() == 'POST':
-            response = requests.post(url, json=data, headers=headers)
-        else:
+        if method.upper() not in ('GET', 'POST'):
             print(f"Unsupported method: {method}")
             return None
         
+        async with session.request(method.upper(), url, json=data) as response:
+            text = await response.text()
+        
         print(f"\n{'='*50}")
         print(f"{method.upper()} {endpoint}")
-        print(f"Status Code: {response.status_code}")
+        print(f"Status Code: {response.status}")
         
         try:
-            result = response.json()
+            result = json.loads(text)
             print(f"Response: {json.dumps(result, indent=2)}")
             return result
         except:
-            print(f"Response: {response.text}")
+            print(f"Response: {text}")
             return None
             
-    except requests.exceptions.ConnectionError:
+    except aiohttp.ClientConnectionError:
         print(f"❌ Error: Could not connect to {url}")
         print("Make sure the server is running: python app.py")
         return None
@@ -55,17 +53,17 @@ def make_request(method, endpoint, data=None):
         print(f"❌ Error: {e}")
         return None
 
-def demo_system_check():
+async def demo_system_check(session):
     """Demonstrate system health check"""
     print("\n🏥 CHECKING SYSTEM HEALTH...")
-    return make_request('GET', '/health')
+    return await make_request(session, 'GET', '/health')
 
-def demo_user_registration():
+async def demo_user_registration(session):
     """Demonstrate user registration"""
     print("\n👤 REGISTERING DEMO USER...")
-    return make_request('POST', '/register', DEMO_USER)
+    return await make_request(session, 'POST', '/register', DEMO_USER)
 
-def demo_location_update():
+async def demo_location_update(session):
     """Demonstrate location update"""
     print("\n📍 UPDATING USER LOCATION...")
     location_data = {
@@ -73,9 +71,9 @@ def demo_location_update():
         "latitude": 40.7128,  # New York City coordinates
         "longitude": -74.0060
     }
-    return make_request('POST', '/location/update', location_data)
+    return await make_request(session, 'POST', '/location/update', location_data)
 
-def demo_emergency_trigger():
+async def demo_emergency_trigger(session):
     """Demonstrate emergency alert triggering"""
     print("\n🚨 TRIGGERING EMERGENCY ALERT...")
     emergency_data = {
@@ -85,36 +83,36 @@ def demo_emergency_trigger():
         "latitude": 40.7589,  # Times Square coordinates
         "longitude": -73.9851
     }
-    return make_request('POST', '/emergency/trigger', emergency_data)
+    return await make_request(session, 'POST', '/emergency/trigger', emergency_data)
 
-def demo_quick_emergency():
+async def demo_quick_emergency(session):
     """Demonstrate quick emergency alert"""
     print("\n⚡ TRIGGERING QUICK EMERGENCY ALERT...")
     quick_data = {
         "phone": DEMO_USER["phone"],
         "alert_type": "medical"
     }
-    return make_request('POST', '/emergency/quick', quick_data)
+    return await make_request(session, 'POST', '/emergency/quick', quick_data)
 
-def demo_user_status():
+async def demo_user_status(session):
     """Demonstrate getting user status"""
     print("\n📊 GETTING USER STATUS...")
-    return make_request('GET', f'/user/status/{DEMO_USER["phone"]}')
+    return await make_request(session, 'GET', f'/user/status/{DEMO_USER["phone"]}')
 
-def demo_active_alerts():
+async def demo_active_alerts(session):
     """Demonstrate getting active alerts"""
     print("\n📋 GETTING ACTIVE ALERTS...")
-    return make_request('GET', '/alerts/active')
+    return await make_request(session, 'GET', '/alerts/active')
 
-def demo_cancel_alert(alert_id):
+async def demo_cancel_alert(session, alert_id):
     """Demonstrate canceling an alert"""
     if alert_id:
         print(f"\n❌ CANCELING ALERT {alert_id}...")
         cancel_data = {"reason": "Demo completed - false alarm"}
-        return make_request('POST', f'/emergency/cancel/{alert_id}', cancel_data)
+        return await make_request(session, 'POST', f'/emergency/cancel/{alert_id}', cancel_data)
     return None
 
-def demo_system_test():
+async def demo_system_test(session):
     """Demonstrate system testing"""
     print("\n🔧 TESTING SYSTEM FUNCTIONALITY...")
     test_data = {
@@ -122,12 +120,59 @@ def demo_system_test():
         "test_location": True,
         "test_notifications": False  # Set to True to actually send test messages
     }
-    return make_request('POST', '/test/system', test_data)
+    return await make_request(session, 'POST', '/test/system', test_data)
 
-def demo_help():
+async def demo_help(session):
     """Demonstrate getting help information"""
     print("\n❓ GETTING SYSTEM HELP...")
-    return make_request('GET', '/emergency/help')
+    return await make_request(session, 'GET', '/emergency/help')
+
+async def run_demo():
+    """Run the demo steps, overlapping the independent read-only requests"""
+    async with aiohttp.ClientSession() as session:
+        # Step 1: Check system health
+        health = await demo_system_check(session)
+        if not health or not health.get('status') == 'healthy':
+            print("❌ System is not healthy. Exiting demo.")
+            return False
+        
+        # Step 2: Register demo user
+        registration = await demo_user_registration(session)
+        if not registration or not registration.get('success'):
+            print("ℹ️  User might already be registered. Continuing with demo...")
+        
+        # Step 3: Update location
+        location = await demo_location_update(session)
+        
+        # Steps 4-6: Get user status, test system and show help together
+        status, test_result, help_info = await asyncio.gather(
+            demo_user_status(session),
+            demo_system_test(session),
+            demo_help(session)
+        )
+        
+        # Step 7: Trigger emergency alert
+        print("\n⏰ Waiting 3 seconds before triggering emergency...")
+        await asyncio.sleep(3)
+        
+        emergency_result = await demo_emergency_trigger(session)
+        alert_id = None
+        if emergency_result and emergency_result.get('success'):
+            alert_id = emergency_result.get('alert_id')
+        
+        # Step 8: Get active alerts
+        active_alerts = await demo_active_alerts(session)
+        
+        # Step 9: Wait and then cancel the alert
+        if alert_id:
+            print(f"\n⏰ Waiting 5 seconds before canceling alert {alert_id}...")
+            await asyncio.sleep(5)
+            cancel_result = await demo_cancel_alert(session, alert_id)
+        
+        # Step 10: Final status check
+        final_status = await demo_user_status(session)
+    
+    return True
 
 def main():
     """Main demonstration function"""
@@ -137,50 +182,9 @@ def main():
     print("It will register a demo user and show various features.")
     print("="*60)
     
-    # Step 1: Check system health
-    health = demo_system_check()
-    if not health or not health.get('status') == 'healthy':
-        print("❌ System is not healthy. Exiting demo.")
+    if not asyncio.run(run_demo()):
         return
     
-    # Step 2: Register demo user
-    registration = demo_user_registration()
-    if not registration or not registration.get('success'):
-        print("ℹ️  User might already be registered. Continuing with demo...")
-    
-    # Step 3: Update location
-    location = demo_location_update()
-    
-    # Step 4: Get user status
-    status = demo_user_status()
-    
-    # Step 5: Test system
-    test_result = demo_system_test()
-    
-    # Step 6: Show help information
-    help_info = demo_help()
-    
-    # Step 7: Trigger emergency alert
-    print("\n⏰ Waiting 3 seconds before triggering emergency...")
-    time.sleep(3)
-    
-    emergency_result = demo_emergency_trigger()
-    alert_id = None
-    if emergency_result and emergency_result.get('success'):
-        alert_id = emergency_result.get('alert_id')
-    
-    # Step 8: Get active alerts
-    active_alerts = demo_active_alerts()
-    
-    # Step 9: Wait and then cancel the alert
-    if alert_id:
-        print(f"\n⏰ Waiting 5 seconds before canceling alert {alert_id}...")
-        time.sleep(5)
-        cancel_result = demo_cancel_alert(alert_id)
-    
-    # Step 10: Final status check
-    final_status = demo_user_status()
-    
     print("\n" + "="*60)
     print("✅ DEMO COMPLETED SUCCESSFULLY!")
     print("="*60)
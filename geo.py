@@ -0,0 +1,130 @@
+import math
+import numpy as np
+from config import Config
+
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:  # numba is optional; fall back to plain Python / NumPy
+    HAVE_NUMBA = False
+    def njit(*args, **kwargs):
+        def decorator(func):
+            return func
+        return decorator
+
+EARTH_RADIUS_M = 6371000.0
+
+_GEOHASH_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+def zone_array(zones):
+    """Build an (N, 5) array of lat, lng, radius_m, max |dlat| and max |dlng| (degrees) from zone dicts"""
+    zones = np.array([(zone['lat'], zone['lng'], zone['radius']) for zone in zones],
+                     dtype=np.float64).reshape(-1, 3)
+    # Bounding box of each zone's spherical cap, for a cheap rejection test;
+    # a cap that reaches a pole spans every longitude
+    angular_radius = zones[:, 2] / EARTH_RADIUS_M
+    polar_margin = np.pi / 2 - np.radians(np.abs(zones[:, 0]))
+    with np.errstate(invalid='ignore'):
+        max_dlng = np.where(
+            angular_radius < polar_margin,
+            np.degrees(np.arcsin(np.sin(angular_radius) / np.cos(np.radians(zones[:, 0])))),
+            180.0
+        )
+    return np.column_stack((zones, np.degrees(angular_radius), max_dlng))
+
+# Config.HIGH_RISK_ZONES in zone_array form
+HIGH_RISK_ZONES = zone_array(Config.HIGH_RISK_ZONES)
+
+@njit(cache=True, fastmath=True)
+def in_any_zone(lat, lng, zones):
+    """Check whether a point lies within any zone of a zone_array"""
+    lat_r = math.radians(lat)
+    cos_lat = math.cos(lat_r)
+    for i in range(zones.shape[0]):
+        # Most zones are far away; rule them out before any trigonometry
+        if abs(zones[i, 0] - lat) > zones[i, 3]:
+            continue
+        dlng = abs(zones[i, 1] - lng) % 360.0
+        if min(dlng, 360.0 - dlng) > zones[i, 4]:
+            continue
+        zone_lat_r = math.radians(zones[i, 0])
+        half_dlat = (zone_lat_r - lat_r) / 2.0
+        half_dlng = math.radians(zones[i, 1] - lng) / 2.0
+        a = (math.sin(half_dlat) ** 2
+             + cos_lat * math.cos(zone_lat_r) * math.sin(half_dlng) ** 2)
+        distance = 2.0 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+        if distance <= zones[i, 2]:
+            return True
+    return False
+
+def haversine_m(lat, lng, lats, lngs):
+    """Distances in meters from one point to arrays of points"""
+    lat_r = np.radians(lat)
+    lats_r = np.radians(lats)
+    a = (np.sin((lats_r - lat_r) / 2) ** 2
+         + np.cos(lat_r) * np.cos(lats_r) * np.sin(np.radians(np.subtract(lngs, lng)) / 2) ** 2)
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+def points_in_any_zone(lats, lngs, zones):
+    """Vectorized in_any_zone: a boolean array with one entry per (lat, lng) point"""
+    lats = np.radians(np.asarray(lats, dtype=np.float64))[:, None]
+    lngs = np.radians(np.asarray(lngs, dtype=np.float64))[:, None]
+    zone_lats = np.radians(zones[:, 0])[None, :]
+    zone_lngs = np.radians(zones[:, 1])[None, :]
+    a = (np.sin((zone_lats - lats) / 2) ** 2
+         + np.cos(lats) * np.cos(zone_lats) * np.sin((zone_lngs - lngs) / 2) ** 2)
+    distances = 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+    return (distances <= zones[None, :, 2]).any(axis=1)
+
+if not HAVE_NUMBA:
+    def in_any_zone(lat, lng, zones):
+        """Check whether a point lies within any zone, as one NumPy pass over the nearby zones"""
+        # Without the JIT, a per-zone Python loop is the slow part; the bounding
+        # box mask drops far-away zones before the haversine
+        dlng = np.abs(zones[:, 1] - lng) % 360.0
+        nearby = zones[(np.abs(zones[:, 0] - lat) <= zones[:, 3])
+                       & (np.minimum(dlng, 360.0 - dlng) <= zones[:, 4])]
+        return bool(nearby.shape[0]) and bool(points_in_any_zone((lat,), (lng,), nearby)[0])
+
+def encode_geohash(lat, lng, precision=7):
+    """Encode a point as a geohash string of the given length"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        # Bits alternate between longitude and latitude, longitude first
+        coord, bounds = (lng, lng_range) if even else (lat, lat_range)
+        mid = (bounds[0] + bounds[1]) / 2
+        value <<= 1
+        if coord >= mid:
+            value |= 1
+            bounds[0] = mid
+        else:
+            bounds[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_GEOHASH_BASE32[value])
+            bits = 0
+            value = 0
+    return ''.join(chars)
+
+def decode_geohash(geohash):
+    """Decode a geohash to the (lat, lng) center of its cell"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        value = _GEOHASH_BASE32.index(char)
+        for shift in range(4, -1, -1):
+            bounds = lng_range if even else lat_range
+            mid = (bounds[0] + bounds[1]) / 2
+            if value >> shift & 1:
+                bounds[0] = mid
+            else:
+                bounds[1] = mid
+            even = not even
+    return (lat_range[0] + lat_range[1]) / 2, (lng_range[0] + lng_range[1]) / 2
@@ -0,0 +1,19 @@
+# Gunicorn configuration for the Emergency Alert System
+# Run with: gunicorn -c gunicorn.conf.py app:app
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+
+# Active alerts live in SQLite, so any worker can serve or cancel them; each
+# alert's follow-up is scheduled by the worker that triggered it
+workers = int(os.getenv('GUNICORN_WORKERS', str(multiprocessing.cpu_count() * 2 + 1)))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '8'))
+keepalive = 5
+timeout = 60
+
+def worker_exit(server, worker):
+    """Cancel alert timers and flush queued location updates"""
+    from app import emergency_service
+    emergency_service.shutdown()
@@ -1,21 +1,51 @@
-import geocoder
-import requests
-from geopy.geocoders import Nominatim
-from geopy.distance import geodesic
+from http_session import create_session
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, Future
 from config import Config
+import geo
+import numpy as np
+import orjson
 import logging
+import math
+import threading
+import time
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Runs the independent lookups behind format_location_for_emergency concurrently
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='location-lookup')
+
+# Nominatim's HTTP API, called directly over its own pooled session
+NOMINATIM_URL = 'https://nominatim.openstreetmap.org'
+NOMINATIM_HEADERS = {
+    'User-Agent': 'emergency_alert_system',
+    'Accept-Encoding': 'gzip'
+}
+
 class LocationService:
     def __init__(self):
-        self.geolocator = Nominatim(user_agent="emergency_alert_system")
         self.google_api_key = Config.GOOGLE_MAPS_API_KEY
+        self.session = create_session()
+        # No retries for Nominatim: a slow geocode must not hold up an alert
+        self.nominatim_session = create_session(retries=0)
+        self.high_risk_zones = geo.HIGH_RISK_ZONES
+        
+        # Memoized Nominatim lookups; errors propagate and are not cached
+        self._reverse = lru_cache(maxsize=4096)(self._reverse_uncached)
+        self._geocode = lru_cache(maxsize=4096)(self._geocode_uncached)
+        
+        # (url, params) -> (expiry, JSON body) for recent API responses, and
+        # (url, params) -> Future for requests still in flight
+        self._response_cache = {}
+        self._inflight = {}
+        self._response_lock = threading.Lock()
     
     def get_current_location_ip(self):
         """Get current location based on IP address (fallback method)"""
         try:
+            # Only this rarely used fallback needs geocoder, so import it on demand
+            import geocoder
             g = geocoder.ip('me')
             if g.ok:
                 return {
@@ -28,15 +58,41 @@ class LocationService:
             logger.error(f"Error getting IP location: {e}")
         return None
     
+    def _reverse_uncached(self, latitude, longitude):
+        """Reverse geocode coordinates to an address (None if unknown)"""
+        response = self.nominatim_session.get(
+            f"{NOMINATIM_URL}/reverse",
+            params={'lat': latitude, 'lon': longitude, 'format': 'json', 'zoom': 18},
+            headers=NOMINATIM_HEADERS,
+            timeout=Config.NOMINATIM_TIMEOUT
+        )
+        response.raise_for_status()
+        return orjson.loads(response.content).get('display_name')
+    
+    def _geocode_uncached(self, address):
+        """Geocode an address to (latitude, longitude, address) (None if unknown)"""
+        response = self.nominatim_session.get(
+            f"{NOMINATIM_URL}/search",
+            params={'q': address, 'format': 'json', 'limit': 1},
+            headers=NOMINATIM_HEADERS,
+            timeout=Config.NOMINATIM_TIMEOUT
+        )
+        response.raise_for_status()
+        results = orjson.loads(response.content)
+        if not results:
+            return None
+        return float(results[0]['lat']), float(results[0]['lon']), results[0]['display_name']
+    
     def get_location_from_coordinates(self, latitude, longitude):
         """Get address from latitude and longitude"""
         try:
-            location = self.geolocator.reverse(f"{latitude}, {longitude}")
-            if location:
+            # 5 decimal places is about 1 m, close enough to share an address
+            address = self._reverse(round(latitude, 5), round(longitude, 5))
+            if address:
                 return {
                     'latitude': latitude,
                     'longitude': longitude,
-                    'address': location.address,
+                    'address': address,
                     'method': 'coordinates'
                 }
         except Exception as e:
@@ -46,12 +102,12 @@ class LocationService:
     def get_location_from_address(self, address):
         """Get coordinates from address"""
         try:
-            location = self.geolocator.geocode(address)
+            location = self._geocode(address.strip().lower())
             if location:
                 return {
-                    'latitude': location.latitude,
-                    'longitude': location.longitude,
-                    'address': location.address,
+                    'latitude': location[0],
+                    'longitude': location[1],
+                    'address': location[2],
                     'method': 'address'
                 }
         except Exception as e:
@@ -61,7 +117,11 @@ class LocationService:
     def calculate_distance(self, coord1, coord2):
         """Calculate distance between two coordinates in kilometers"""
         try:
-            return geodesic(coord1, coord2).kilometers
+            lat1 = math.radians(coord1[0])
+            lat2 = math.radians(coord2[0])
+            a = (math.sin((lat2 - lat1) / 2) ** 2
+                 + math.cos(lat1) * math.cos(lat2) * math.sin(math.radians(coord2[1] - coord1[1]) / 2) ** 2)
+            return 2 * geo.EARTH_RADIUS_M / 1000 * math.asin(math.sqrt(a))
         except Exception as e:
             logger.error(f"Error calculating distance: {e}")
             return None
@@ -81,32 +141,21 @@ class LocationService:
                 'key': self.google_api_key
             }
             
-            response = requests.get(url, params=params)
-            if response.status_code == 200:
-                data = response.json()
-                hospitals = []
-                
-                for place in data.get('results', []):
-                    hospital = {
+            data = self._cached_get(url, params)
+            if data is not None:
+                # Return top 5 nearest
+                return [
+                    {
                         'name': place.get('name'),
                         'address': place.get('vicinity'),
-                        'latitude': place['geometry']['location']['lat'],
-                        'longitude': place['geometry']['location']['lng'],
+                        'latitude': lat,
+                        'longitude': lng,
                         'rating': place.get('rating'),
-                        'place_id': place.get('place_id')
+                        'place_id': place.get('place_id'),
+                        'distance': distance
                     }
-                    
-                    # Calculate distance
-                    hospital['distance'] = self.calculate_distance(
-                        (latitude, longitude),
-                        (hospital['latitude'], hospital['longitude'])
-                    )
-                    
-                    hospitals.append(hospital)
-                
-                # Sort by distance
-                hospitals.sort(key=lambda x: x.get('distance', float('inf')))
-                return hospitals[:5]  # Return top 5 nearest
+                    for place, lat, lng, distance in self._nearest_places(latitude, longitude, data.get('results', []), 5)
+                ]
                 
         except Exception as e:
             logger.error(f"Error finding hospitals: {e}")
@@ -136,39 +185,83 @@ class LocationService:
                 'key': self.google_api_key
             }
             
-            response = requests.get(url, params=params)
-            if response.status_code == 200:
-                data = response.json()
-                services = []
-                
-                for place in data.get('results', []):
-                    service = {
+            data = self._cached_get(url, params)
+            if data is not None:
+                # Return top 3 nearest
+                return [
+                    {
                         'name': place.get('name'),
                         'address': place.get('vicinity'),
-                        'latitude': place['geometry']['location']['lat'],
-                        'longitude': place['geometry']['location']['lng'],
+                        'latitude': lat,
+                        'longitude': lng,
                         'type': service_type,
                         'rating': place.get('rating'),
-                        'place_id': place.get('place_id')
+                        'place_id': place.get('place_id'),
+                        'distance': distance
                     }
-                    
-                    # Calculate distance
-                    service['distance'] = self.calculate_distance(
-                        (latitude, longitude),
-                        (service['latitude'], service['longitude'])
-                    )
-                    
-                    services.append(service)
-                
-                # Sort by distance
-                services.sort(key=lambda x: x.get('distance', float('inf')))
-                return services[:3]  # Return top 3 nearest
+                    for place, lat, lng, distance in self._nearest_places(latitude, longitude, data.get('results', []), 3)
+                ]
                 
         except Exception as e:
             logger.error(f"Error finding emergency services: {e}")
         
         return self._get_mock_emergency_services(latitude, longitude, service_type)
     
+    def _cached_get(self, url, params):
+        """GET a JSON response (None unless status 200), sharing identical concurrent and recent requests"""
+        key = (url, tuple(sorted(params.items())))
+        with self._response_lock:
+            cached = self._response_cache.get(key)
+            if cached and cached[0] > time.monotonic():
+                return cached[1]
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._inflight[key] = Future()
+                owner = True
+            else:
+                owner = False
+        
+        if not owner:
+            # Another thread is already making this request; wait for its answer
+            return future.result()
+        
+        try:
+            response = self.session.get(url, params=params, timeout=5)
+            data = orjson.loads(response.content) if response.status_code == 200 else None
+        except Exception as e:
+            with self._response_lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+        
+        with self._response_lock:
+            del self._inflight[key]
+            if data is not None:
+                self._response_cache.pop(key, None)
+                if len(self._response_cache) >= Config.API_CACHE_SIZE:
+                    # Evict the oldest entry (dicts keep insertion order)
+                    self._response_cache.pop(next(iter(self._response_cache)))
+                self._response_cache[key] = (time.monotonic() + Config.API_CACHE_TTL, data)
+        future.set_result(data)
+        return data
+    
+    def _nearest_places(self, latitude, longitude, places, limit):
+        """Pick the nearest Places API results as (place, lat, lng, distance_km) tuples, nearest first"""
+        if not places:
+            return []
+        
+        # Parse coordinates once into parallel arrays, then one vectorized
+        # haversine over all results instead of a geodesic per place
+        locations = [place['geometry']['location'] for place in places]
+        lats = np.fromiter((location['lat'] for location in locations), float, len(places))
+        lngs = np.fromiter((location['lng'] for location in locations), float, len(places))
+        distances = geo.haversine_m(latitude, longitude, lats, lngs) / 1000
+        order = np.argsort(distances, kind='stable')[:limit]
+        return [
+            (places[i], float(lats[i]), float(lngs[i]), float(distances[i]))
+            for i in order.tolist()
+        ]
+    
     def _get_mock_emergency_services(self, latitude, longitude, service_type):
         """Mock emergency services data for testing"""
         mock_services = {
@@ -218,27 +311,35 @@ class LocationService:
         
         return mock_services.get(service_type, [])
     
+    def close(self):
+        """Close pooled HTTP connections"""
+        self.session.close()
+        self.nominatim_session.close()
+    
     def is_in_high_risk_zone(self, latitude, longitude):
         """Check if location is in a predefined high-risk zone"""
-        for zone in Config.HIGH_RISK_ZONES:
-            distance = self.calculate_distance(
-                (latitude, longitude),
-                (zone['lat'], zone['lng'])
-            )
-            if distance and distance <= (zone['radius'] / 1000):  # Convert meters to km
-                return True
-        return False
+        return geo.in_any_zone(latitude, longitude, self.high_risk_zones)
+    
+    def are_in_high_risk_zone(self, latitudes, longitudes):
+        """Check a batch of locations against the high-risk zones at once"""
+        return geo.points_in_any_zone(latitudes, longitudes, self.high_risk_zones)
     
-    def format_location_for_emergency(self, latitude, longitude, address=None):
+    def format_location_for_emergency(self, latitude, longitude, address=None, lookup_address=True):
         """Format location information for emergency services"""
-        if not address:
+        # Find nearest emergency services while the address is looked up
+        hospitals_future = _executor.submit(self.get_emergency_services_nearby, latitude, longitude, 'hospital')
+        
+        if not address and not lookup_address:
+            address = 'Address not available'
+        elif not address:
             location_data = self.get_location_from_coordinates(latitude, longitude)
             address = location_data.get('address', 'Address not available') if location_data else 'Address not available'
         
-        # Find nearest emergency services
-        hospitals = self.get_emergency_services_nearby(latitude, longitude, 'hospital')
+        hospitals = hospitals_future.result()
         
         emergency_info = {
+            'latitude': latitude,
+            'longitude': longitude,
             'coordinates': f"{latitude}, {longitude}",
             'address': address,
             'google_maps_link': f"https://www.google.com/maps?q={latitude},{longitude}",
@@ -1,24 +1,72 @@
-import smtplib
-import requests
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from twilio.rest import Client
+from http_session import create_session
 from config import Config
 import logging
-import json
+import orjson
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Fans out the individual SMS/email/API sends of one emergency alert
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='notification-send')
+
+# Fixed part of the message sent to emergency services, filled in per alert
+_EMERGENCY_TEMPLATE = """🚨 EMERGENCY ALERT 🚨
+
+Alert Type: {alert_type}
+User: {user_name}
+Phone: {user_phone}
+
+LOCATION:
+Coordinates: {latitude}, {longitude}
+Address: {address}
+Google Maps: https://www.google.com/maps?q={latitude},{longitude}
+
+Time: {timestamp}
+Message: {message}
+
+Medical Info: {medical_info}
+
+NEAREST HOSPITALS:
+"""
+
+# Text sent to each emergency contact, filled in once per alert
+_CONTACT_MESSAGE_TEMPLATE = """
+Emergency Alert for {name}
+
+Location: {address}
+Coordinates: {latitude}, {longitude}
+Google Maps: https://www.google.com/maps?q={latitude},{longitude}
+
+Time: {timestamp}
+Alert Type: {alert_type}
+
+Emergency services have been notified.
+"""
+
+def _parse_contact(contact):
+    """Split a "Name: Phone" (or bare phone) contact into (name, phone)"""
+    name, sep, phone = contact.partition(':')
+    if not sep:
+        return "Emergency Contact", contact.strip()
+    return name.strip(), phone.strip()
+
 class NotificationService:
     def __init__(self):
         self.twilio_client = None
+        self.session = create_session()
+        # One logged-in SMTP connection shared by all sends; smtplib is not thread-safe
+        self._smtp = None
+        self._smtp_lock = threading.Lock()
         self.setup_twilio()
     
     def setup_twilio(self):
         """Initialize Twilio client if credentials are available"""
         try:
             if Config.TWILIO_ACCOUNT_SID and Config.TWILIO_AUTH_TOKEN:
+                # Imported here so the Twilio SDK is only loaded when it is used
+                from twilio.rest import Client
                 self.twilio_client = Client(Config.TWILIO_ACCOUNT_SID, Config.TWILIO_AUTH_TOKEN)
                 logger.info("Twilio client initialized successfully")
             else:
@@ -59,6 +107,10 @@ class NotificationService:
             if emergency:
                 subject = f"🚨 EMERGENCY ALERT: {subject}"
             
+            import smtplib
+            from email.mime.text import MIMEText
+            from email.mime.multipart import MIMEMultipart
+            
             msg = MIMEMultipart()
             msg['From'] = Config.EMAIL_USERNAME
             msg['To'] = to_email
@@ -66,13 +118,14 @@ class NotificationService:
             
             msg.attach(MIMEText(body, 'plain'))
             
-            server = smtplib.SMTP(Config.SMTP_SERVER, Config.SMTP_PORT)
-            server.starttls()
-            server.login(Config.EMAIL_USERNAME, Config.EMAIL_PASSWORD)
-            
             text = msg.as_string()
-            server.sendmail(Config.EMAIL_USERNAME, to_email, text)
-            server.quit()
+            with self._smtp_lock:
+                try:
+                    self._get_smtp().sendmail(Config.EMAIL_USERNAME, to_email, text)
+                except smtplib.SMTPServerDisconnected:
+                    # The server dropped the idle connection; log in again once
+                    self._smtp = None
+                    self._get_smtp().sendmail(Config.EMAIL_USERNAME, to_email, text)
             
             logger.info(f"Email sent successfully to {to_email}")
             return True
@@ -81,6 +134,16 @@ class NotificationService:
             logger.error(f"Error sending email: {e}")
             return False
     
+    def _get_smtp(self):
+        """Return the logged-in SMTP connection, opening it on first use"""
+        if self._smtp is None:
+            import smtplib
+            server = smtplib.SMTP(Config.SMTP_SERVER, Config.SMTP_PORT)
+            server.starttls()
+            server.login(Config.EMAIL_USERNAME, Config.EMAIL_PASSWORD)
+            self._smtp = server
+        return self._smtp
+    
     def notify_emergency_services(self, emergency_data):
         """Send alert to emergency services"""
         try:
@@ -128,10 +191,10 @@ class NotificationService:
                 'message': emergency_data.get('message')
             }
             
-            response = requests.post(
+            response = self.session.post(
                 Config.EMERGENCY_API_ENDPOINT,
                 headers=headers,
-                json=payload,
+                data=orjson.dumps(payload),
                 timeout=10
             )
             
@@ -163,37 +226,31 @@ class NotificationService:
     
     def _format_emergency_message(self, emergency_data):
         """Format emergency data into a readable message"""
-        message = f"""
-🚨 EMERGENCY ALERT 🚨
-
-Alert Type: {emergency_data.get('alert_type', 'General Emergency')}
-User: {emergency_data.get('user_name', 'Unknown')}
-Phone: {emergency_data.get('user_phone', 'Not provided')}
-
-LOCATION:
-Coordinates: {emergency_data['latitude']}, {emergency_data['longitude']}
-Address: {emergency_data.get('address', 'Address not available')}
-Google Maps: https://www.google.com/maps?q={emergency_data['latitude']},{emergency_data['longitude']}
-
-Time: {emergency_data.get('timestamp', 'Not specified')}
-Message: {emergency_data.get('message', 'No additional message')}
-
-Medical Info: {emergency_data.get('medical_info', 'None provided')}
-
-NEAREST HOSPITALS:
-"""
+        parts = [_EMERGENCY_TEMPLATE.format(
+            alert_type=emergency_data.get('alert_type', 'General Emergency'),
+            user_name=emergency_data.get('user_name', 'Unknown'),
+            user_phone=emergency_data.get('user_phone', 'Not provided'),
+            latitude=emergency_data['latitude'],
+            longitude=emergency_data['longitude'],
+            address=emergency_data.get('address', 'Address not available'),
+            timestamp=emergency_data.get('timestamp', 'Not specified'),
+            message=emergency_data.get('message', 'No additional message'),
+            medical_info=emergency_data.get('medical_info', 'None provided')
+        )]
         
         # Add nearest hospitals information
         hospitals = emergency_data.get('nearest_hospitals', [])
         if hospitals:
-            for i, hospital in enumerate(hospitals[:3], 1):
-                message += f"\n{i}. {hospital.get('name', 'Unknown Hospital')}"
-                message += f"\n   Address: {hospital.get('address', 'Unknown')}"
-                message += f"\n   Distance: {hospital.get('distance', 'Unknown')} km"
+            parts.extend(
+                f"\n{i}. {hospital.get('name', 'Unknown Hospital')}"
+                f"\n   Address: {hospital.get('address', 'Unknown')}"
+                f"\n   Distance: {hospital.get('distance', 'Unknown')} km"
+                for i, hospital in enumerate(hospitals[:3], 1)
+            )
         else:
-            message += "\nNo nearby hospitals found"
+            parts.append("\nNo nearby hospitals found")
         
-        return message.strip()
+        return ''.join(parts).rstrip()
     
     def send_emergency_alert(self, user_data, location_data, alert_type="medical", message=None):
         """Send complete emergency alert to all relevant parties"""
@@ -214,18 +271,18 @@ NEAREST HOSPITALS:
             }
             
             # Send to emergency services
-            emergency_sent = self.notify_emergency_services(emergency_data)
-            
-            # Send to emergency contacts
-            contacts_notified = self._notify_emergency_contacts(user_data, emergency_data)
+            emergency_future = _executor.submit(self.notify_emergency_services, emergency_data)
             
             # Send confirmation to user (if conscious and able to receive)
-            user_notified = self._notify_user(user_data, emergency_data)
+            user_future = _executor.submit(self._notify_user, user_data, emergency_data)
+            
+            # Send to emergency contacts while the other sends are in flight
+            contacts_notified = self._notify_emergency_contacts(user_data, emergency_data)
             
             return {
-                'emergency_services': emergency_sent,
+                'emergency_services': emergency_future.result(),
                 'emergency_contacts': contacts_notified,
-                'user_notified': user_notified,
+                'user_notified': user_future.result(),
                 'alert_id': emergency_data.get('alert_id')
             }
             
@@ -236,49 +293,42 @@ NEAREST HOSPITALS:
     def _notify_emergency_contacts(self, user_data, emergency_data):
         """Notify user's emergency contacts"""
         try:
-            notified_contacts = []
-            
             # Get emergency contacts from user data
             contacts = [
-                user_data.get('emergency_contact_1'),
-                user_data.get('emergency_contact_2')
+                _parse_contact(contact) for contact in (
+                    user_data.get('emergency_contact_1'),
+                    user_data.get('emergency_contact_2')
+                ) if contact
             ]
             
-            for contact in contacts:
-                if contact:
-                    # Assume contact is in format "Name: Phone" or just phone
-                    if ':' in contact:
-                        contact_name, contact_phone = contact.split(':', 1)
-                        contact_name = contact_name.strip()
-                        contact_phone = contact_phone.strip()
-                    else:
-                        contact_name = "Emergency Contact"
-                        contact_phone = contact.strip()
-                    
-                    # Send SMS to contact
-                    contact_message = f"""
-Emergency Alert for {user_data.get('name', 'Unknown')}
-
-Location: {emergency_data.get('address', 'Unknown location')}
-Coordinates: {emergency_data['latitude']}, {emergency_data['longitude']}
-Google Maps: https://www.google.com/maps?q={emergency_data['latitude']},{emergency_data['longitude']}
-
-Time: {emergency_data.get('timestamp', 'Unknown')}
-Alert Type: {emergency_data.get('alert_type', 'General')}
-
-Emergency services have been notified.
-                    """
-                    
-                    if self.send_sms(contact_phone, contact_message, emergency=True):
-                        notified_contacts.append(contact_phone)
-                        logger.info(f"Emergency contact {contact_name} ({contact_phone}) notified")
+            # Every contact gets the same message
+            contact_message = _CONTACT_MESSAGE_TEMPLATE.format(
+                name=user_data.get('name', 'Unknown'),
+                address=emergency_data.get('address', 'Unknown location'),
+                latitude=emergency_data['latitude'],
+                longitude=emergency_data['longitude'],
+                timestamp=emergency_data.get('timestamp', 'Unknown'),
+                alert_type=emergency_data.get('alert_type', 'General')
+            )
             
-            return notified_contacts
+            # Text all contacts at once
+            results = _executor.map(
+                lambda contact: self._notify_emergency_contact(*contact, contact_message),
+                contacts
+            )
+            return [contact_phone for contact_phone in results if contact_phone]
             
         except Exception as e:
             logger.error(f"Error notifying emergency contacts: {e}")
             return []
     
+    def _notify_emergency_contact(self, contact_name, contact_phone, contact_message):
+        """Text one emergency contact, returning their phone number if sent"""
+        if self.send_sms(contact_phone, contact_message, emergency=True):
+            logger.info(f"Emergency contact {contact_name} ({contact_phone}) notified")
+            return contact_phone
+        return None
+    
     def _notify_user(self, user_data, emergency_data):
         """Send confirmation to user that help is on the way"""
         try:
@@ -317,6 +367,18 @@ Stay calm and wait for assistance.
             logger.error(f"Error notifying user: {e}")
             return []
     
+    def close(self):
+        """Close pooled HTTP and SMTP connections"""
+        self.session.close()
+        with self._smtp_lock:
+            if self._smtp is not None:
+                try:
+                    self._smtp.quit()
+                except Exception:
+                    # Already disconnected
+                    pass
+                self._smtp = None
+    
     def send_test_notification(self, phone=None, email=None):
         """Send test notification to verify service is working"""
         try:
@@ -1,48 +1,57 @@
 import sqlite3
 import datetime
-
-def db_ddl_dml_operations(q):
-    con = sqlite3.connect("library_db.db")
-    con.execute(q)
+import argparse
+import csv
+import itertools
+
+# One connection for the whole session instead of one per statement,
+# opened on first use so importing this module doesn't touch the database
+_conn = None
+
+def get_conn():
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect("library_db.db")
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.execute("PRAGMA synchronous=NORMAL")
+    return _conn
+
+def db_ddl_dml_operations(q, params=()):
+    con = get_conn()
+    con.execute(q, params)
     con.commit()
-    con.close()
 
 def create_all_tables():
-
-    query1 = """
-            create table all_books
+    # Idempotent DDL, applied in one transaction on every start;
+    # bnum and senr are the rowid of their tables, the issue log gets indexes
+    get_conn().executescript("""
+            begin;
+            create table if not exists all_books
             (
-              bnum numeric(7),
+              bnum integer primary key,
               btitle varchar(25),
               bauthor varchar(25),
               bpubliation varchar(25)
-            )
-             """
-    query2 = """
-            create table all_students
+            );
+            create table if not exists all_students
             (
-              senr numeric(12),
+              senr integer primary key,
               sname varchar(25),
               sclass varchar(15),
               semail varchar(40),
-              smob numeric(15) 
-            ) 
-              """
-    query3 = """
-            create table all_issued
+              smob numeric(15)
+            );
+            create table if not exists all_issued
             (
                 enr numeric(10),
                 bnum numeric(7),
                 idate varchar(15),
                 rdate varchar(15)
-            )
-              """
-    db_ddl_dml_operations(query1)
-    print("Table : all_books created...")
-    db_ddl_dml_operations(query2)
-    print("Table : all_students created...")
-    db_ddl_dml_operations(query3)
-    print("Table : all_issued created...")
+            );
+            create index if not exists idx_issued_bnum on all_issued(bnum, rdate);
+            create index if not exists idx_issued_enr on all_issued(enr);
+            commit;
+             """)
 
 def get_date():
     a = datetime.date.today()
@@ -52,25 +61,43 @@ def get_date():
 def db_select_operations(q):
     pass
 
+ISSUE_SQL = "insert into all_issued values(?, ?, ?, ?)"
+RETURN_SQL = "update all_issued set rdate=? " \
+             "where bnum=? and rdate='NR' "
+ADD_STUD_SQL = "insert into all_students values(?, ?, ?, ?, ?) "
+ADD_BOOK_SQL = "insert into all_books values(?, ?, ?, ?) "
+
+def issue_book_core(enr, bnum):
+    db_ddl_dml_operations(ISSUE_SQL, (enr, bnum, get_date(), "NR"))
+
+def return_book_core(bnum):
+    db_ddl_dml_operations(RETURN_SQL, (get_date(), bnum))
+
+def add_new_stud_core(enr, name, sclass, email, mobile):
+    db_ddl_dml_operations(ADD_STUD_SQL, (enr, name, sclass, email, mobile))
+
+def bulk_add_students(rows):
+    # One transaction (and one commit) for any number of (enr, name, class, email, mobile) rows
+    con = get_conn()
+    with con:
+        con.executemany(ADD_STUD_SQL, rows)
+
+def bulk_add_books(rows):
+    # One transaction for any number of (bnum, title, author, publication) rows
+    con = get_conn()
+    with con:
+        con.executemany(ADD_BOOK_SQL, rows)
+
 def issue_book():
     e = input("Enter Enrollment Number : ")
     b = input("Enter Book Number : ")
-    idate = get_date()
-
-    qry = "insert into all_issued values({0}, {1}, '{2}', '{3}' )".format(e,b,idate,"NR")
-    db_ddl_dml_operations(qry)
+    issue_book_core(e, b)
     print("Book Issued...")
-    input()
 
 def return_book():
     b = input("Enter Book Number to Return : ")
-    ret_date = get_date()
-
-    qry = "update all_issued set rdate={0} " \
-          "where bnum={1} and rdate='NR' ".format(ret_date, b)
-    db_ddl_dml_operations(qry)
+    return_book_core(b)
     print("Book Returned..")
-    input()
 
 def view_not_ret_books():
     pass
@@ -87,11 +114,8 @@ def add_new_stud():
     cl = input("Enter Class : ")
     em = input("Enter Email : ")
     m = input("Enter Mobile Number : ")
-
-    qry = "insert into all_students values({0}, {1}, {2}, {3}, {4}) ".format(e,n,cl,em,m)
-    db_ddl_dml_operations(qry)
+    add_new_stud_core(e, n, cl, em, m)
     print("New Student Added..")
-    input()
 
 def add_new_book():
     pass
@@ -102,31 +126,83 @@ def view_stud_history():
 def view_book_history():
     pass
 
-try:
+# Batch CSV rows: issue,enr,bnum / return,bnum / student,enr,name,class,email,mobile /
+# book,bnum,title,author,publication
+BATCH_OPS = {
+    "issue": (ISSUE_SQL, 2, lambda row: (row[0], row[1], get_date(), "NR")),
+    "return": (RETURN_SQL, 1, lambda row: (get_date(), row[0])),
+    "student": (ADD_STUD_SQL, 5, tuple),
+    "book": (ADD_BOOK_SQL, 4, tuple),
+}
+
+def read_batch(path):
+    # Check every row before anything is written; returns [(op, fields)] or None
+    ops = []
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        for row in reader:
+            if not row:
+                continue
+            op = row[0].strip().lower()
+            if op not in BATCH_OPS:
+                print("Line", reader.line_num, ": unknown operation", repr(row[0]))
+                return None
+            nfields = BATCH_OPS[op][1]
+            if len(row) - 1 != nfields:
+                print("Line", reader.line_num, ":", op, "needs", nfields, "values, got", len(row) - 1)
+                return None
+            ops.append((op, row[1:]))
+    return ops
+
+def main_batch(path):
+    # Consecutive rows of the same operation go through one executemany,
+    # and the whole file is a single transaction
+    ops = read_batch(path)
+    if ops is None:
+        print("Nothing applied from", path)
+        return
+    con = get_conn()
+    with con:
+        for op, group in itertools.groupby(ops, key=lambda item: item[0]):
+            qry, _, to_params = BATCH_OPS[op]
+            con.executemany(qry, [to_params(fields) for _, fields in group])
+    print(len(ops), "operations applied from", path)
+
+def main_interactive():
+    while True:
+        print("Select operation")
+        print("1 - Issue Book")
+        print("2 - Return Book")
+        print("3 - View Not Returned Books")
+        print("4 - Search Student")
+        print("5 - Search Book")
+        print("6 - Add New Student")
+        print("7 - Add New Book")
+        print("8 - View Student History")
+        print("9 - View Book History")
+        print("0 - Exit")
+        ch = int(input("Provide your choice : "))
+        if ch==1: issue_book()
+        elif ch==2: return_book()
+        elif ch==3: view_not_ret_books()
+        elif ch==4: search_student()
+        elif ch==5: search_book()
+        elif ch==6: add_new_stud()
+        elif ch==7: add_new_book()
+        elif ch==8: view_stud_history()
+        elif ch==9: view_book_history()
+        elif ch==0: exit(0)
+
+def main():
     create_all_tables()
-except sqlite3.OperationalError as ex:
-    pass
 
-while True:
-    print("Select operation")
-    print("1 - Issue Book")
-    print("2 - Return Book")
-    print("3 - View Not Returned Books")
-    print("4 - Search Student")
-    print("5 - Search Book")
-    print("6 - Add New Student")
-    print("7 - Add New Book")
-    print("8 - View Student History")
-    print("9 - View Book History")
-    print("0 - Exit")
-    ch = int(input("Provide your choice : "))
-    if ch==1: issue_book()
-    elif ch==2: return_book()
-    elif ch==3: view_not_ret_books()
-    elif ch==4: search_student()
-    elif ch==5: search_book()
-    elif ch==6: add_new_stud()
-    elif ch==7: add_new_book()
-    elif ch==8: view_stud_history()
-    elif ch==9: view_book_history()
-    elif ch==0: exit(0)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Library management")
+    parser.add_argument("--batch", metavar="CSV", help="apply operations from a CSV file instead of the menu")
+    args = parser.parse_args()
+    if args.batch:
+        main_batch(args.batch)
+    else:
+        main_interactive()
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file